@@ -0,0 +1,39 @@
+"""limit the oauth_states hash index to unused states
+
+Revision ID: 1c5e8a3f7b2d
+Revises: f4b9d2c6e8a3
+Create Date: 2025-08-14 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c5e8a3f7b2d'
+down_revision: Union[str, None] = 'f4b9d2c6e8a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # State verification only ever matches unused states
+    op.drop_index('idx_oauth_states_hash', table_name='oauth_states')
+    op.create_index(
+        'idx_oauth_states_hash',
+        'oauth_states',
+        ['state_hash'],
+        postgresql_using='hash',
+        postgresql_where=sa.text('used = false'),
+    )
+
+def downgrade():
+    op.drop_index('idx_oauth_states_hash', table_name='oauth_states')
+    op.create_index(
+        'idx_oauth_states_hash',
+        'oauth_states',
+        ['state_hash'],
+        postgresql_using='hash',
+    )
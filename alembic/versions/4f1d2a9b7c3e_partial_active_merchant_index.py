@@ -0,0 +1,38 @@
+"""replace idx_merchant_active with partial unique index on active merchants
+
+Revision ID: 4f1d2a9b7c3e
+Revises: c30ebf96137e
+Create Date: 2025-08-12 10:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f1d2a9b7c3e'
+down_revision: Union[str, None] = 'c30ebf96137e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # The hot credential lookup filters on (merchant_id, is_active = true); a partial
+    # index turns the is_active filter into an index condition
+    op.drop_index('idx_merchant_active', table_name='zid_credentials')
+    op.create_index(
+        'idx_zid_cred_active_merchant',
+        'zid_credentials',
+        ['merchant_id'],
+        unique=True,
+        postgresql_where=sa.text('is_active'),
+    )
+    # Equality lookups on merchant_id are already served by the unique constraint
+    op.drop_index('ix_zid_credentials_merchant_id', table_name='zid_credentials')
+
+def downgrade():
+    op.create_index('ix_zid_credentials_merchant_id', 'zid_credentials', ['merchant_id'])
+    op.drop_index('idx_zid_cred_active_merchant', table_name='zid_credentials')
+    op.create_index('idx_merchant_active', 'zid_credentials', ['merchant_id', 'is_active'])
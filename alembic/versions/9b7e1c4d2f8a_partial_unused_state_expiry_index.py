@@ -0,0 +1,33 @@
+"""replace idx_expires_cleanup with partial index on unused oauth states
+
+Revision ID: 9b7e1c4d2f8a
+Revises: 4f1d2a9b7c3e
+Create Date: 2025-08-12 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b7e1c4d2f8a'
+down_revision: Union[str, None] = '4f1d2a9b7c3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # Most rows end up used=true; only index the states that can still expire unused
+    op.drop_index('idx_expires_cleanup', table_name='oauth_states')
+    op.create_index(
+        'idx_oauth_states_unused_expires',
+        'oauth_states',
+        ['expires_at'],
+        postgresql_where=sa.text('used = false'),
+    )
+
+def downgrade():
+    op.drop_index('idx_oauth_states_unused_expires', table_name='oauth_states')
+    op.create_index('idx_expires_cleanup', 'oauth_states', ['expires_at'])
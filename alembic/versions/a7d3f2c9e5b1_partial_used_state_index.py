@@ -0,0 +1,31 @@
+"""partial index on used oauth states for the cleanup sweep
+
+Revision ID: a7d3f2c9e5b1
+Revises: 1c5e8a3f7b2d
+Create Date: 2025-08-14 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3f2c9e5b1'
+down_revision: Union[str, None] = '1c5e8a3f7b2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # Lets the periodic "DELETE ... WHERE used = true" avoid a sequential scan
+    op.create_index(
+        'idx_oauth_states_used',
+        'oauth_states',
+        ['expires_at'],
+        postgresql_where=sa.text('used = true'),
+    )
+
+def downgrade():
+    op.drop_index('idx_oauth_states_used', table_name='oauth_states')
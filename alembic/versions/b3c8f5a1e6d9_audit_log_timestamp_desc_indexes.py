@@ -0,0 +1,40 @@
+"""order token_audit_logs composite indexes by timestamp descending
+
+Revision ID: b3c8f5a1e6d9
+Revises: 9b7e1c4d2f8a
+Create Date: 2025-08-12 12:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3c8f5a1e6d9'
+down_revision: Union[str, None] = '9b7e1c4d2f8a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # Audit reads are "latest N for a merchant/action", so match ORDER BY timestamp DESC
+    op.drop_index('idx_merchant_timestamp', table_name='token_audit_logs')
+    op.drop_index('idx_action_timestamp', table_name='token_audit_logs')
+    op.create_index(
+        'idx_tal_merchant_time',
+        'token_audit_logs',
+        ['merchant_id', sa.text('timestamp DESC')],
+    )
+    op.create_index(
+        'idx_tal_action_time',
+        'token_audit_logs',
+        ['action', sa.text('timestamp DESC')],
+    )
+
+def downgrade():
+    op.drop_index('idx_tal_action_time', table_name='token_audit_logs')
+    op.drop_index('idx_tal_merchant_time', table_name='token_audit_logs')
+    op.create_index('idx_action_timestamp', 'token_audit_logs', ['action', 'timestamp'])
+    op.create_index('idx_merchant_timestamp', 'token_audit_logs', ['merchant_id', 'timestamp'])
@@ -0,0 +1,30 @@
+"""drop single-column indexes shadowed by unique constraints and composites
+
+Revision ID: d6a2e9f4b1c7
+Revises: b3c8f5a1e6d9
+Create Date: 2025-08-12 12:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6a2e9f4b1c7'
+down_revision: Union[str, None] = 'b3c8f5a1e6d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # merchant_id is the leading column of idx_tal_merchant_time
+    op.drop_index('ix_token_audit_logs_merchant_id', table_name='token_audit_logs')
+    # state_hash is covered by its unique constraint and idx_state_expires
+    op.drop_index('ix_oauth_states_state_hash', table_name='oauth_states')
+    # ix_zid_credentials_merchant_id was already dropped in 4f1d2a9b7c3e
+
+def downgrade():
+    op.create_index('ix_oauth_states_state_hash', 'oauth_states', ['state_hash'])
+    op.create_index('ix_token_audit_logs_merchant_id', 'token_audit_logs', ['merchant_id'])
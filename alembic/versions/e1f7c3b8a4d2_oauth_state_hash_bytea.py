@@ -0,0 +1,48 @@
+"""store oauth_states.state_hash as bytea with a hash index
+
+Revision ID: e1f7c3b8a4d2
+Revises: d6a2e9f4b1c7
+Create Date: 2025-08-12 14:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f7c3b8a4d2'
+down_revision: Union[str, None] = 'd6a2e9f4b1c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # State lookups are pure equality, so a hash index on the raw 32-byte digest
+    # replaces both btrees (hash indexes cannot be unique; states are 256-bit random)
+    op.drop_index('idx_state_expires', table_name='oauth_states')
+    op.drop_constraint('oauth_states_state_hash_key', 'oauth_states', type_='unique')
+    op.alter_column(
+        'oauth_states',
+        'state_hash',
+        type_=sa.LargeBinary(32),
+        postgresql_using="decode(state_hash, 'hex')",
+    )
+    op.create_index(
+        'idx_oauth_states_hash',
+        'oauth_states',
+        ['state_hash'],
+        postgresql_using='hash',
+    )
+
+def downgrade():
+    op.drop_index('idx_oauth_states_hash', table_name='oauth_states')
+    op.alter_column(
+        'oauth_states',
+        'state_hash',
+        type_=sa.String(),
+        postgresql_using="encode(state_hash, 'hex')",
+    )
+    op.create_unique_constraint('oauth_states_state_hash_key', 'oauth_states', ['state_hash'])
+    op.create_index('idx_state_expires', 'oauth_states', ['state_hash', 'expires_at'])
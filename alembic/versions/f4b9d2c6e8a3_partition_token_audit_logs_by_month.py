@@ -0,0 +1,127 @@
+"""partition token_audit_logs by month on timestamp
+
+Revision ID: f4b9d2c6e8a3
+Revises: e1f7c3b8a4d2
+Create Date: 2025-08-13 09:30:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b9d2c6e8a3'
+down_revision: Union[str, None] = 'e1f7c3b8a4d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Number of monthly partitions created ahead of the current month
+MONTHS_AHEAD = 12
+
+COLUMNS = "id, merchant_id, action, timestamp, success, error_message, ip_address, user_agent"
+
+
+def _next_month(month: datetime) -> datetime:
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def upgrade():
+    conn = op.get_bind()
+
+    # Move the existing table aside, freeing its index names
+    op.drop_index('idx_tal_merchant_time', table_name='token_audit_logs')
+    op.drop_index('idx_tal_action_time', table_name='token_audit_logs')
+    op.rename_table('token_audit_logs', 'token_audit_logs_old')
+    op.execute("ALTER INDEX token_audit_logs_pkey RENAME TO token_audit_logs_old_pkey")
+
+    # Partitioned parent; the primary key must include the partition column
+    op.execute("""
+        CREATE TABLE token_audit_logs (
+            id VARCHAR NOT NULL,
+            merchant_id VARCHAR NOT NULL,
+            action VARCHAR NOT NULL,
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            success BOOLEAN NOT NULL,
+            error_message TEXT,
+            ip_address VARCHAR,
+            user_agent VARCHAR,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.create_index(
+        'idx_tal_merchant_time',
+        'token_audit_logs',
+        ['merchant_id', sa.text('timestamp DESC')],
+    )
+    op.create_index(
+        'idx_tal_action_time',
+        'token_audit_logs',
+        ['action', sa.text('timestamp DESC')],
+    )
+
+    # Monthly partitions from the oldest existing row through MONTHS_AHEAD
+    now = datetime.utcnow()
+    oldest = conn.execute(sa.text("SELECT min(timestamp) FROM token_audit_logs_old")).scalar() or now
+    month = oldest.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+
+    while month <= last:
+        upper = _next_month(month)
+        op.execute(
+            f"CREATE TABLE token_audit_logs_{month:%Y_%m} PARTITION OF token_audit_logs "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+        )
+        # Copy one month per statement to bound lock time and WAL per batch
+        op.execute(
+            f"INSERT INTO token_audit_logs ({COLUMNS}) "
+            f"SELECT {COLUMNS} FROM token_audit_logs_old "
+            f"WHERE timestamp >= '{month:%Y-%m-%d}' AND timestamp < '{upper:%Y-%m-%d}'"
+        )
+        month = upper
+
+    # Catch-all so inserts never fail if a month was not provisioned in time
+    op.execute("CREATE TABLE token_audit_logs_default PARTITION OF token_audit_logs DEFAULT")
+
+    op.drop_table('token_audit_logs_old')
+
+def downgrade():
+    op.rename_table('token_audit_logs', 'token_audit_logs_partitioned')
+    op.execute("ALTER INDEX idx_tal_merchant_time RENAME TO idx_tal_merchant_time_partitioned")
+    op.execute("ALTER INDEX idx_tal_action_time RENAME TO idx_tal_action_time_partitioned")
+    op.execute("ALTER INDEX token_audit_logs_pkey RENAME TO token_audit_logs_partitioned_pkey")
+
+    op.create_table('token_audit_logs',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('merchant_id', sa.String(), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('success', sa.Boolean(), nullable=False),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('ip_address', sa.String(), nullable=True),
+        sa.Column('user_agent', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(
+        f"INSERT INTO token_audit_logs ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM token_audit_logs_partitioned"
+    )
+    op.create_index(
+        'idx_tal_merchant_time',
+        'token_audit_logs',
+        ['merchant_id', sa.text('timestamp DESC')],
+    )
+    op.create_index(
+        'idx_tal_action_time',
+        'token_audit_logs',
+        ['action', sa.text('timestamp DESC')],
+    )
+
+    # Dropping the parent drops all of its partitions
+    op.drop_table('token_audit_logs_partitioned')
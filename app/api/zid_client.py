@@ -1,19 +1,74 @@
 import asyncio
+import time
+from collections import OrderedDict
 import httpx
+import orjson
 import logging
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, bindparam
 
 from ..models.database import ZidCredential
 from ..database import get_db
 from ..auth.token_manager import TokenManager
-from ..auth.oauth_service import OAuthService
+from ..auth.oauth_service import get_oauth_service
 from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+# Precomputed credential lookup, executed with {"merchant_id": ...}
+_ACTIVE_CREDENTIAL_STMT = select(ZidCredential).where(
+    ZidCredential.merchant_id == bindparam("merchant_id"),
+    ZidCredential.is_active == True
+)
+
+class ZidUnavailableError(Exception):
+    """Zid could not be reached or kept failing (transport errors, timeouts, 429/5xx)"""
+
+class _RateLimiter:
+    """Token bucket allowing `rate` requests per `period` seconds"""
+    
+    def __init__(self, rate: int, period: float):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Reserve a request slot and wait until it is due"""
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.rate,
+                self._tokens + (now - self._updated) * self.rate / self.period
+            )
+            self._updated = now
+            # Going negative reserves a future slot, so waiters queue in order
+            self._tokens -= 1
+            wait = -self._tokens * self.period / self.rate if self._tokens < 0 else 0.0
+        # Sleep outside the lock so one waiter doesn't serialize the merchant's callers
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+# Upper bound on per-merchant state kept in memory; least recently used is evicted
+_MAX_TRACKED_MERCHANTS = 10_000
+
+# Per-merchant limiters shared across client instances
+_merchant_limiters: "OrderedDict[str, _RateLimiter]" = OrderedDict()
+
+def _get_rate_limiter(merchant_id: str, rate: int, period: float) -> _RateLimiter:
+    """Return the merchant's shared limiter, creating it on first use"""
+    limiter = _merchant_limiters.get(merchant_id)
+    if limiter is None:
+        limiter = _merchant_limiters[merchant_id] = _RateLimiter(rate, period)
+        if len(_merchant_limiters) > _MAX_TRACKED_MERCHANTS:
+            _merchant_limiters.popitem(last=False)
+    else:
+        _merchant_limiters.move_to_end(merchant_id)
+    return limiter
+
 class ZidAPIClient:
     """
     Authenticated API client for Zid e-commerce platform
@@ -29,14 +84,19 @@ class ZidAPIClient:
     - Token validation and health checks
     """
     
+    # Shared HTTP client so all instances reuse one connection pool
+    _client: Optional[httpx.AsyncClient] = None
+    _timeout = httpx.Timeout(30.0)
+    _limits = httpx.Limits(max_keepalive_connections=50, max_connections=200)
+    
     def __init__(self, merchant_id: str):
         self.merchant_id = merchant_id
         self.base_url = "https://api.zid.sa"
         self.token_manager = TokenManager()
-        self.oauth_service = OAuthService()
+        self.oauth_service = get_oauth_service()
         
         # API client configuration
-        self.timeout = httpx.Timeout(30.0)
+        self.timeout = self._timeout
         self.max_retries = 3
         self.retry_delay = 1.0  # seconds
         
@@ -46,48 +106,102 @@ class ZidAPIClient:
         
         # Token expiry buffer
         self.token_refresh_buffer = timedelta(minutes=30)
+        
+        # Invariant Zid API headers, built once per client
+        self._static_headers = {
+            "Role": "Manager",  # Required role for API access
+            "Accept-Language": "all-languages",  # Get both Arabic and English content
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "User-Agent": f"ZidIntegration/1.0.0 (Merchant: {merchant_id})"
+        }
+        
+        # Short-lived credential cache to avoid a SELECT per API call; token
+        # writes outside this client invalidate it via invalidate_zid_credentials()
+        self._cred_cache: Optional[Tuple[ZidCredential, float]] = None
+        self._cred_cache_ttl = settings.credential_cache_seconds
+        
+        # Decrypted tokens, valid while the credential row's updated_at is unchanged
+        self._token_cache: Optional[Tuple[datetime, Dict[str, str]]] = None
+    
+    @classmethod
+    async def _get_client(cls) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use"""
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                timeout=cls._timeout,
+                http2=True,
+                limits=cls._limits
+            )
+        return cls._client
+    
+    @classmethod
+    async def aclose(cls):
+        """Close the shared HTTP client (called on application shutdown)"""
+        _clients.clear()
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
     
     async def _get_credentials(self) -> Optional[ZidCredential]:
         """Retrieve active credentials for the merchant"""
+        if self._cred_cache is not None:
+            credential, cached_at = self._cred_cache
+            if time.monotonic() - cached_at < self._cred_cache_ttl:
+                return credential
+        
         try:
             async with get_db() as db:
-                stmt = select(ZidCredential).where(
-                    ZidCredential.merchant_id == self.merchant_id,
-                    ZidCredential.is_active == True
+                result = await db.execute(
+                    _ACTIVE_CREDENTIAL_STMT, {"merchant_id": self.merchant_id}
                 )
-                result = await db.execute(stmt)
-                return result.scalar_one_or_none()
+                credential = result.scalar_one_or_none()
+            
+            if credential:
+                self._cred_cache = (credential, time.monotonic())
+                _register_client(self)
+            return credential
         except Exception as e:
             logger.error(f"Failed to retrieve credentials for merchant {self.merchant_id}: {str(e)}")
             return None
     
+    def _invalidate_credentials(self):
+        """Drop cached credentials so the next lookup hits the database"""
+        self._cred_cache = None
+    
     async def _decrypt_tokens(self, credential: ZidCredential) -> Optional[Dict[str, str]]:
         """Decrypt stored tokens"""
+        if self._token_cache is not None and self._token_cache[0] == credential.updated_at:
+            return self._token_cache[1]
+        
         try:
-            access_token = await self.token_manager.decrypt_token(credential.access_token)
-            authorization_token = await self.token_manager.decrypt_token(credential.authorization_token)
-            refresh_token = await self.token_manager.decrypt_token(credential.refresh_token)
+            access_token = self.token_manager.decrypt_token(credential.access_token)
+            authorization_token = self.token_manager.decrypt_token(credential.authorization_token)
+            refresh_token = self.token_manager.decrypt_token(credential.refresh_token)
             
             if not all([access_token, authorization_token, refresh_token]):
                 logger.error(f"Failed to decrypt tokens for merchant {self.merchant_id}")
                 return None
             
-            return {
+            tokens = {
                 "access_token": access_token,
                 "authorization_token": authorization_token,
                 "refresh_token": refresh_token,
             }
+            self._token_cache = (credential.updated_at, tokens)
+            return tokens
         except Exception as e:
             logger.error(f"Token decryption failed for merchant {self.merchant_id}: {str(e)}")
             return None
     
-    async def _should_refresh_token(self, credential: ZidCredential) -> bool:
+    async def _should_refresh_token(self, credential: ZidCredential,
+                                    now: Optional[datetime] = None) -> bool:
         """Check if tokens should be refreshed based on expiry"""
         if not credential.expires_at:
             return False
         
         # Refresh if token expires within the buffer window
-        refresh_threshold = datetime.utcnow() + self.token_refresh_buffer
+        refresh_threshold = (now or datetime.utcnow()) + self.token_refresh_buffer
         return credential.expires_at <= refresh_threshold
     
     async def _refresh_tokens_if_needed(self, credential: ZidCredential) -> bool:
@@ -97,9 +211,11 @@ class ZidAPIClient:
         
         try:
             logger.info(f"Refreshing tokens for merchant {self.merchant_id}")
-            await self.oauth_service.refresh_tokens(
+            refreshed = await self.oauth_service.refresh_credential(
                 merchant_id=self.merchant_id
             )
+            # Seed the cache with the row returned by the refresh UPDATE
+            self._cred_cache = (refreshed, time.monotonic())
             return True
         except Exception as e:
             logger.error(f"Token refresh failed for merchant {self.merchant_id}: {str(e)}")
@@ -116,7 +232,7 @@ class ZidAPIClient:
         if not await self._refresh_tokens_if_needed(credential):
             return None
         
-        # Get fresh credential after potential refresh
+        # Get fresh credential after potential refresh (cache hit if no refresh happened)
         credential = await self._get_credentials()
         if not credential:
             return None
@@ -127,23 +243,12 @@ class ZidAPIClient:
             return None
         
         # Build Zid's required headers according to API documentation
-        headers = {
-            # Authentication headers
+        return {
+            **self._static_headers,
             "Access-Token": tokens["access_token"],  # Required by Zid API
             "Authorization": f"Bearer {tokens['authorization_token']}",  # Required by Zid API
-            
-            # Required Zid API headers
             "Store-Id": str(credential.store_id),  # Use store_id from credentials
-            "Role": "Manager",  # Required role for API access
-            "Accept-Language": "all-languages",  # Get both Arabic and English content
-            
-            # Standard headers
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "User-Agent": f"ZidIntegration/1.0.0 (Merchant: {self.merchant_id})"
         }
-        
-        return headers
     
     async def _make_request(
         self, 
@@ -178,52 +283,68 @@ class ZidAPIClient:
         
         url = f"{self.base_url}{endpoint}"
         
+        # Looked up only once credentials exist, so unknown merchant IDs never take a slot
+        rate_limiter = _get_rate_limiter(
+            self.merchant_id, self.rate_limit_per_minute, self.rate_limit_window
+        )
+        
+        # Serialize the body once rather than on every retry attempt
+        content = orjson.dumps(data) if data is not None and method in ["POST", "PUT", "PATCH"] else None
+        
+        client = await self._get_client()
+        
         # Retry logic
         for attempt in range(self.max_retries):
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.request(
-                        method=method,
-                        url=url,
-                        json=data if method in ["POST", "PUT", "PATCH"] else None,
-                        params=params,
-                        headers=auth_headers
-                    )
-                    
-                    # Log request details
-                    logger.info(f"Zid API {method} {endpoint} -> {response.status_code}")
+                # Shape load client-side so we rarely hit Zid's 429s
+                await rate_limiter.acquire()
+                response = await client.request(
+                    method=method,
+                    url=url,
+                    content=content,
+                    params=params,
+                    headers=auth_headers,
+                    timeout=self.timeout
+                )
+                
+                # Log request details
+                logger.info(f"Zid API {method} {endpoint} -> {response.status_code}")
+                
+                # Handle response
+                if response.status_code == 200:
+                    return response.json()
+                elif response.status_code == 401:
+                    logger.warning(f"Authentication failed for merchant {self.merchant_id}")
+                    # Try to refresh tokens and retry once
+                    if attempt == 0:
+                        await self.oauth_service.refresh_tokens(self.merchant_id)
+                        self._invalidate_credentials()
+                        continue
+                    return None
+                elif response.status_code in [429, 502, 503, 504]:
+                    # Rate limiting or server errors - retry with backoff
+                    if attempt < self.max_retries - 1:
+                        wait_time = self.retry_delay * (2 ** attempt)
+                        logger.warning(f"API request failed ({response.status_code}), retrying in {wait_time}s")
+                        await asyncio.sleep(wait_time)
+                        continue
+                elif response.status_code >= 500:
+                    logger.error(f"API request failed: {response.status_code} - {response.text}")
+                    raise ZidUnavailableError(f"Zid API returned {response.status_code}")
+                else:
+                    logger.error(f"API request failed: {response.status_code} - {response.text}")
+                    return None
                     
-                    # Handle response
-                    if response.status_code == 200:
-                        return response.json()
-                    elif response.status_code == 401:
-                        logger.warning(f"Authentication failed for merchant {self.merchant_id}")
-                        # Try to refresh tokens and retry once
-                        if attempt == 0:
-                            await self.oauth_service.refresh_tokens(self.merchant_id)
-                            continue
-                        return None
-                    elif response.status_code in [429, 502, 503, 504]:
-                        # Rate limiting or server errors - retry with backoff
-                        if attempt < self.max_retries - 1:
-                            wait_time = self.retry_delay * (2 ** attempt)
-                            logger.warning(f"API request failed ({response.status_code}), retrying in {wait_time}s")
-                            await asyncio.sleep(wait_time)
-                            continue
-                    else:
-                        logger.error(f"API request failed: {response.status_code} - {response.text}")
-                        return None
-                        
             except httpx.RequestError as e:
                 logger.error(f"HTTP request failed (attempt {attempt + 1}): {str(e)}")
                 if attempt < self.max_retries - 1:
                     wait_time = self.retry_delay * (2 ** attempt)
                     await asyncio.sleep(wait_time)
                     continue
-                return None
+                raise ZidUnavailableError(f"Zid API unreachable: {str(e)}") from e
         
         logger.error(f"API request failed after {self.max_retries} attempts")
-        return None
+        raise ZidUnavailableError(f"Zid API still failing after {self.max_retries} attempts")
     
     # Convenience methods for different HTTP verbs
     async def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
@@ -269,8 +390,9 @@ class ZidAPIClient:
                 }
             
             # Check expiry
-            is_expired = credential.expires_at and credential.expires_at <= datetime.utcnow()
-            needs_refresh = await self._should_refresh_token(credential)
+            now = datetime.utcnow()
+            is_expired = credential.expires_at and credential.expires_at <= now
+            needs_refresh = await self._should_refresh_token(credential, now)
             
             return {
                 "valid": True,
@@ -288,4 +410,30 @@ class ZidAPIClient:
                 "valid": False,
                 "error": str(e),
                 "merchant_id": self.merchant_id
-            }
\ No newline at end of file
+            }
+
+# Per-merchant client instances shared across requests; only merchants with an
+# active credential are registered, least recently used first out
+_clients: "OrderedDict[str, ZidAPIClient]" = OrderedDict()
+
+def get_zid_client(merchant_id: str) -> ZidAPIClient:
+    """Return the shared ZidAPIClient for a merchant, or a fresh one until it is registered"""
+    client = _clients.get(merchant_id)
+    if client is None:
+        return ZidAPIClient(merchant_id)
+    _clients.move_to_end(merchant_id)
+    return client
+
+def _register_client(client: ZidAPIClient):
+    """Share a client once it has found an active credential"""
+    if client.merchant_id in _clients:
+        return
+    _clients[client.merchant_id] = client
+    if len(_clients) > _MAX_TRACKED_MERCHANTS:
+        _clients.popitem(last=False)
+
+def invalidate_zid_credentials(merchant_id: str):
+    """Drop a merchant's cached credentials after its tokens change elsewhere"""
+    client = _clients.get(merchant_id)
+    if client is not None:
+        client._invalidate_credentials()
\ No newline at end of file
@@ -1,27 +1,59 @@
 import os
+import time
 import secrets
 import hashlib
-from urllib.parse import urlencode
+from urllib.parse import urlencode, quote_plus
 from typing import Optional, Dict, Any, Tuple
 import httpx
+import orjson
 from fastapi import HTTPException
+from pydantic import BaseModel, ConfigDict, Field, AliasChoices, ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime, timedelta
 import logging
 
-import urllib
-
-from ..models.database import ZidCredential, OAuthState, TokenAuditLog
+from ..models.database import ZidCredential, OAuthState
 from ..database import get_db
+from ..services.audit_log import log_audit, enqueue_audit
 from .token_manager import TokenManager
 from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SCOPES = ["read_orders", "read_products", "read_customers", "webhooks"]
+
+# Decrypted refresh tokens keyed by ciphertext, so a rewritten row never hits a stale entry
+_refresh_token_cache: Dict[str, Tuple[str, float]] = {}
+_REFRESH_TOKEN_CACHE_TTL = 300.0  # seconds
+_REFRESH_TOKEN_CACHE_SIZE = 4096
+
+class TokenResponse(BaseModel):
+    """Zid token endpoint response (refresh grant); unknown fields are kept"""
+    model_config = ConfigDict(extra="allow")
+    
+    access_token: str = Field(min_length=1)
+    # Zid has returned this field both capitalized and lowercase
+    Authorization: str = Field(min_length=1, validation_alias=AliasChoices("Authorization", "authorization"))
+    refresh_token: Optional[str] = None
+    expires_in: int = 31536000  # Zid tokens expire in 1 year
+
+class CodeTokenResponse(TokenResponse):
+    """Zid token endpoint response for the authorization code grant"""
+    refresh_token: str = Field(min_length=1)
+
+def _hash_state(state: str) -> bytes:
+    """SHA-256 digest of an OAuth state, as stored in oauth_states.state_hash"""
+    return hashlib.sha256(state.encode()).digest()
+
 class OAuthService:
     """Zid OAuth 2.0 service with triple token system support"""
     
+    # Shared HTTP client so token exchanges reuse connections to oauth.zid.sa
+    _client: Optional[httpx.AsyncClient] = None
+    _limits = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+    
     def __init__(self):
         self.client_id = settings.zid_client_id
         self.client_secret = settings.zid_client_secret
@@ -31,6 +63,45 @@ class OAuthService:
         
         if not all([self.client_id, self.client_secret, self.redirect_uri]):
             raise ValueError("Missing required OAuth environment variables")
+        
+        # Static part of the authorize URL; only scope and state vary per call
+        self._auth_url_prefix = f"{self.oauth_base_url}/oauth/authorize?" + urlencode({
+            "response_type": "code",
+            "client_id": self.client_id,
+            "redirect_uri": self.redirect_uri
+        })
+        self._default_scope_param = urlencode({"scope": " ".join(DEFAULT_SCOPES)})
+        
+        # Static token request form fields; only code / refresh_token vary per call
+        self._code_form_prefix = urlencode({
+            "grant_type": "authorization_code",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "redirect_uri": self.redirect_uri
+        })
+        self._refresh_form_prefix = urlencode({
+            "grant_type": "refresh_token",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret
+        })
+    
+    @classmethod
+    async def _get_client(cls) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use"""
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                timeout=30.0,
+                http2=True,
+                limits=cls._limits
+            )
+        return cls._client
+    
+    @classmethod
+    async def aclose(cls):
+        """Close the shared HTTP client (called on application shutdown)"""
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
     
     async def generate_authorization_url(self, merchant_id: str, scopes: Optional[list] = None) -> str:
         """
@@ -43,35 +114,30 @@ class OAuthService:
         Returns:
             Authorization URL for redirect
         """
-        if scopes is None:
-            scopes = ["read_orders", "read_products", "read_customers", "webhooks"]
-        
         try:
             # Generate secure state parameter
             state = secrets.token_urlsafe(32)
-            state_hash = hashlib.sha256(state.encode()).hexdigest()
+            state_hash = _hash_state(state)
             
             # Store state in database for verification
+            now = datetime.utcnow()
             async with get_db() as db:
                 oauth_state = OAuthState(
                     state_hash=state_hash,
                     merchant_id=merchant_id,
-                    created_at=datetime.utcnow(),
-                    expires_at=datetime.utcnow() + timedelta(minutes=settings.oauth_state_expiry_minutes)
+                    created_at=now,
+                    expires_at=now + timedelta(minutes=settings.oauth_state_expiry_minutes)
                 )
                 db.add(oauth_state)
                 await db.commit()
             
-            # Build authorization URL
-            params = {
-                "response_type": "code",
-                "client_id": self.client_id,
-                "redirect_uri": self.redirect_uri,
-                "scope": " ".join(scopes),
-                "state": state
-            }
+            # Build authorization URL (state is urlsafe base64 and needs no escaping)
+            if scopes is None:
+                scope_param = self._default_scope_param
+            else:
+                scope_param = urlencode({"scope": " ".join(scopes)})
             
-            auth_url = f"{self.oauth_base_url}/oauth/authorize?{urllib.parse.urlencode(params)}"
+            auth_url = f"{self._auth_url_prefix}&{scope_param}&state={state}"
             
             # Log authorization initiation
             await self._log_token_action(
@@ -112,17 +178,19 @@ class OAuthService:
         """
         merchant_id = None
         try:
-            # Verify and get merchant_id from state
-            merchant_id = await self._verify_state(state)
+            # Consume the state in its own short transaction; it is single-use either
+            # way, and no connection or row lock is held across the HTTP exchange
+            async with get_db() as db:
+                merchant_id = await self._verify_state(db, state)
+                await db.commit()
             
-            # Exchange authorization code for tokens
+            # Exchange authorization code for tokens (outside any session)
             token_response = await self._exchange_code_for_tokens(code)
             
             # Store tokens securely with encryption
-            credential_id = await self._store_tokens(merchant_id, token_response)
-            
-            # Clean up used state
-            await self._cleanup_state(state)
+            async with get_db() as db:
+                credential_id = await self._store_tokens(db, merchant_id, token_response)
+                await db.commit()
             
             # Log successful authentication
             await self._log_token_action(
@@ -169,40 +237,30 @@ class OAuthService:
                 )
             raise HTTPException(status_code=500, detail="Authentication failed")
     
-    async def _verify_state(self, state: str) -> str:
-        """Verify OAuth state parameter and return merchant_id"""
-        state_hash = hashlib.sha256(state.encode()).hexdigest()
+    async def _verify_state(self, db: AsyncSession, state: str) -> str:
+        """Verify OAuth state parameter, mark it used and return merchant_id"""
+        state_hash = _hash_state(state)
         
-        async with get_db() as db:
-            stmt = select(OAuthState).where(
-                OAuthState.state_hash == state_hash,
-                OAuthState.expires_at > datetime.utcnow(),
-                OAuthState.used == False
-            )
-            result = await db.execute(stmt)
-            oauth_state = result.scalar_one_or_none()
-            
-            if not oauth_state:
-                logger.warning(f"Invalid or expired state parameter: {state_hash[:8]}...")
-                raise HTTPException(status_code=400, detail="Invalid or expired state parameter")
-            
-            # Mark state as used
-            oauth_state.used = True
-            await db.commit()
-            
-            return oauth_state.merchant_id
+        # Check and consume the state atomically (committed by the caller)
+        stmt = update(OAuthState).where(
+            OAuthState.state_hash == state_hash,
+            OAuthState.expires_at > datetime.utcnow(),
+            OAuthState.used == False
+        ).values(used=True).returning(OAuthState.merchant_id)
+        result = await db.execute(stmt)
+        merchant_id = result.scalar_one_or_none()
+        
+        if not merchant_id:
+            logger.warning(f"Invalid or expired state parameter: {state_hash.hex()[:8]}...")
+            raise HTTPException(status_code=400, detail="Invalid or expired state parameter")
+        
+        return merchant_id
     
     async def _exchange_code_for_tokens(self, code: str) -> Dict[str, Any]:
         """Exchange authorization code for Zid triple token system"""
         token_url = f"{self.oauth_base_url}/oauth/token"
         
-        data = {
-            "grant_type": "authorization_code",
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "code": code,
-            "redirect_uri": self.redirect_uri
-        }
+        content = f"{self._code_form_prefix}&code={quote_plus(code)}".encode()
         
         headers = {
             "Content-Type": "application/x-www-form-urlencoded",
@@ -210,121 +268,78 @@ class OAuthService:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(token_url, data=data, headers=headers)
-                
-                if response.status_code != 200:
-                    error_detail = response.text
-                    logger.error(f"Token exchange failed: {response.status_code} - {error_detail}")
-                    raise HTTPException(
-                        status_code=400, 
-                        detail=f"Token exchange failed: {error_detail}"
-                    )
-                
-                token_data = response.json()
-                
-                # Log the actual token response for debugging
-                logger.info(f"Token response fields: {list(token_data.keys())}")
-                
-                # Validate required tokens - check both capitalized and lowercase versions
-                access_token = token_data.get("access_token")
-                authorization_token = token_data.get("Authorization") or token_data.get("authorization")
-                refresh_token = token_data.get("refresh_token")
-                
-                missing_fields = []
-                if not access_token:
-                    missing_fields.append("access_token")
-                if not authorization_token:
-                    missing_fields.append("Authorization/authorization")
-                if not refresh_token:
-                    missing_fields.append("refresh_token")
-                
-                if missing_fields:
-                    logger.error(f"Missing token fields: {missing_fields}")
-                    logger.error(f"Full token response: {token_data}")
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Incomplete token response: missing {missing_fields}"
-                    )
-                
-                # Normalize the response to use consistent field names
-                normalized_response = {
-                    "access_token": access_token,
-                    "Authorization": authorization_token,
-                    "refresh_token": refresh_token,
-                    **{k: v for k, v in token_data.items() if k not in ["access_token", "Authorization", "authorization", "refresh_token"]}
-                }
-                
-                logger.info("Token exchange completed successfully")
-                return normalized_response
-                
-        except httpx.RequestError as e:
-            logger.error(f"HTTP request failed during token exchange: {str(e)}")
-            raise HTTPException(status_code=503, detail="OAuth service unavailable")
-    
-    async def _store_tokens(self, merchant_id: str, token_response: Dict[str, Any]) -> str:
-        """Store Zid triple tokens securely with encryption"""
-        async with get_db() as db:
-            # Check if credential already exists
-            stmt = select(ZidCredential).where(ZidCredential.merchant_id == merchant_id)
-            result = await db.execute(stmt)
-            existing_credential = result.scalar_one_or_none()
-            
-            # Calculate token expiration (Zid tokens expire in 1 year)
-            expires_at = datetime.utcnow() + timedelta(seconds=token_response.get("expires_in", 31536000))
-            
-            # Encrypt all three tokens
-            encrypted_access_token = await self.token_manager.encrypt_token(
-                token_response["access_token"]
-            )
-            encrypted_authorization_token = await self.token_manager.encrypt_token(
-                token_response["Authorization"]
-            )
-            encrypted_refresh_token = await self.token_manager.encrypt_token(
-                token_response["refresh_token"]
-            )
+            client = await self._get_client()
+            response = await client.post(token_url, content=content, headers=headers)
             
-            if existing_credential:
-                # Update existing credential
-                existing_credential.access_token = encrypted_access_token
-                existing_credential.authorization_token = encrypted_authorization_token
-                existing_credential.refresh_token = encrypted_refresh_token
-                existing_credential.expires_at = expires_at
-                existing_credential.updated_at = datetime.utcnow()
-                existing_credential.is_active = True
-                
-                credential_id = existing_credential.id
-                logger.info(f"Updated existing credentials for merchant {merchant_id}")
-                
-            else:
-                # Create new credential
-                credential = ZidCredential(
-                    merchant_id=merchant_id,
-                    access_token=encrypted_access_token,
-                    authorization_token=encrypted_authorization_token,
-                    refresh_token=encrypted_refresh_token,
-                    expires_at=expires_at,
-                    is_active=True
+            if response.status_code != 200:
+                error_detail = response.text
+                logger.error(f"Token exchange failed: {response.status_code} - {error_detail}")
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"Token exchange failed: {error_detail}"
                 )
-                
-                db.add(credential)
-                await db.flush()
-                credential_id = credential.id
-                logger.info(f"Created new credentials for merchant {merchant_id}")
             
-            await db.commit()
-            return credential_id
+            token_data = orjson.loads(response.content)
+            
+            # Log the actual token response for debugging
+            logger.info(f"Token response fields: {list(token_data.keys())}")
+            
+            # Validate required tokens and normalize field names
+            try:
+                parsed = CodeTokenResponse.model_validate(token_data)
+            except ValidationError as e:
+                missing_fields = [str(err["loc"][0]) for err in e.errors()]
+                logger.error(f"Missing token fields: {missing_fields}")
+                logger.error(f"Full token response: {token_data}")
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Incomplete token response: missing {missing_fields}"
+                )
+            
+            logger.info("Token exchange completed successfully")
+            return parsed.model_dump()
+            
+        except httpx.RequestError as e:
+            logger.error(f"HTTP request failed during token exchange: {str(e)}")
+            raise HTTPException(status_code=503, detail="OAuth service unavailable")
     
-    async def _cleanup_state(self, state: str):
-        """Clean up used OAuth state"""
-        state_hash = hashlib.sha256(state.encode()).hexdigest()
+    async def _store_tokens(self, db: AsyncSession, merchant_id: str, token_response: Dict[str, Any]) -> str:
+        """Store Zid triple tokens securely with encryption (committed by the caller)"""
+        # Calculate token expiration (Zid tokens expire in 1 year)
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=token_response.get("expires_in", 31536000))
+        
+        # Encrypt all three tokens
+        encrypted_tokens = self.token_manager.encrypt_tokens({
+            "access_token": token_response["access_token"],
+            "authorization_token": token_response["Authorization"],
+            "refresh_token": token_response["refresh_token"]
+        })
+        
+        # Insert or update the merchant's credential in a single round-trip
+        stmt = pg_insert(ZidCredential).values(
+            merchant_id=merchant_id,
+            **encrypted_tokens,
+            expires_at=expires_at,
+            is_active=True
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ZidCredential.merchant_id],
+            set_={
+                "access_token": stmt.excluded.access_token,
+                "authorization_token": stmt.excluded.authorization_token,
+                "refresh_token": stmt.excluded.refresh_token,
+                "expires_at": stmt.excluded.expires_at,
+                "updated_at": now,
+                "is_active": True
+            }
+        ).returning(ZidCredential.id)
         
-        async with get_db() as db:
-            stmt = update(OAuthState).where(
-                OAuthState.state_hash == state_hash
-            ).values(used=True)
-            await db.execute(stmt)
-            await db.commit()
+        result = await db.execute(stmt)
+        credential_id = result.scalar_one()
+        
+        logger.info(f"Stored credentials for merchant {merchant_id}")
+        return credential_id
     
     async def refresh_tokens(self, merchant_id: str,
                            ip_address: Optional[str] = None,
@@ -340,44 +355,83 @@ class OAuthService:
         Returns:
             Dictionary with refresh result
         """
+        await self.refresh_credential(
+            merchant_id=merchant_id,
+            ip_address=ip_address,
+            user_agent=user_agent
+        )
+        
+        return {
+            "success": True,
+            "merchant_id": merchant_id,
+            "message": "Tokens refreshed successfully"
+        }
+    
+    async def refresh_credential(self, merchant_id: str,
+                                 ip_address: Optional[str] = None,
+                                 user_agent: Optional[str] = None) -> ZidCredential:
+        """
+        Refresh tokens for a merchant and return the updated credential row
+        
+        Args:
+            merchant_id: Merchant identifier
+            ip_address: Client IP for audit logging
+            user_agent: Client user agent for audit logging
+            
+        Returns:
+            The refreshed ZidCredential, so callers need not re-query it
+        """
         try:
+            # Read and release the connection before the HTTP exchange
             async with get_db() as db:
-                # Get existing credential
-                stmt = select(ZidCredential).where(ZidCredential.merchant_id == merchant_id)
+                # Only the id and refresh token are needed to refresh
+                stmt = select(ZidCredential.id, ZidCredential.refresh_token).where(
+                    ZidCredential.merchant_id == merchant_id
+                )
                 result = await db.execute(stmt)
-                credential = result.scalar_one_or_none()
-                
-                if not credential:
-                    raise HTTPException(status_code=404, detail="Merchant authentication not found")
-                
-                # Decrypt refresh token
-                refresh_token = await self.token_manager.decrypt_token(credential.refresh_token)
-                if not refresh_token:
-                    logger.error(f"Failed to decrypt refresh token for merchant {merchant_id}")
-                    raise HTTPException(status_code=400, detail="Invalid refresh token")
-                
-                # Exchange refresh token for new tokens
-                new_tokens = await self._exchange_refresh_token(refresh_token)
-                
-                # Update stored tokens
-                await self._update_tokens(credential, new_tokens)
-                
-                # Log successful refresh
-                await self._log_token_action(
-                    merchant_id=merchant_id,
-                    action="tokens_refreshed",
-                    success=True,
-                    ip_address=ip_address,
-                    user_agent=user_agent
+                row = result.one_or_none()
+            
+            if not row:
+                raise HTTPException(status_code=404, detail="Merchant authentication not found")
+            
+            # Decrypt refresh token
+            refresh_token = self._decrypt_refresh_token(row.refresh_token)
+            if not refresh_token:
+                logger.error(f"Failed to decrypt refresh token for merchant {merchant_id}")
+                raise HTTPException(status_code=400, detail="Invalid refresh token")
+            
+            # Exchange refresh token for new tokens (no session or row lock held)
+            new_tokens = await self._exchange_refresh_token(refresh_token)
+            
+            # Optimistic write: only applies if nobody refreshed since the read
+            async with get_db() as db:
+                credential = await self._update_tokens(
+                    db, row.id, new_tokens, expected_refresh_token=row.refresh_token
                 )
-                
-                logger.info(f"Tokens refreshed successfully for merchant {merchant_id}")
-                
-                return {
-                    "success": True,
-                    "merchant_id": merchant_id,
-                    "message": "Tokens refreshed successfully"
-                }
+                if credential is None:
+                    # A concurrent refresh won; its tokens are just as fresh, so keep them
+                    logger.info(f"Concurrent token refresh for merchant {merchant_id}; keeping the stored tokens")
+                    result = await db.execute(
+                        select(ZidCredential).where(ZidCredential.id == row.id)
+                    )
+                    credential = result.scalar_one_or_none()
+                    if credential is None:
+                        raise HTTPException(status_code=404, detail="Merchant authentication not found")
+                await db.commit()
+            
+            _refresh_token_cache.pop(row.refresh_token, None)
+            
+            # Log successful refresh
+            await self._log_token_action(
+                merchant_id=merchant_id,
+                action="tokens_refreshed",
+                success=True,
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
+            
+            logger.info(f"Tokens refreshed successfully for merchant {merchant_id}")
+            return credential
                 
         except HTTPException:
             await self._log_token_action(
@@ -400,16 +454,25 @@ class OAuthService:
             )
             raise HTTPException(status_code=500, detail="Token refresh failed")
     
+    def _decrypt_refresh_token(self, encrypted_token: str) -> Optional[str]:
+        """Decrypt a stored refresh token, reusing recent results for hot merchants"""
+        cached = _refresh_token_cache.get(encrypted_token)
+        if cached and time.monotonic() - cached[1] < _REFRESH_TOKEN_CACHE_TTL:
+            return cached[0]
+        
+        refresh_token = self.token_manager.decrypt_token(encrypted_token)
+        if refresh_token:
+            if len(_refresh_token_cache) >= _REFRESH_TOKEN_CACHE_SIZE:
+                # Evict the oldest entry
+                _refresh_token_cache.pop(next(iter(_refresh_token_cache)))
+            _refresh_token_cache[encrypted_token] = (refresh_token, time.monotonic())
+        return refresh_token
+    
     async def _exchange_refresh_token(self, refresh_token: str) -> Dict[str, Any]:
         """Exchange refresh token for new access tokens"""
         token_url = f"{self.oauth_base_url}/oauth/token"
         
-        data = {
-            "grant_type": "refresh_token",
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "refresh_token": refresh_token
-        }
+        content = f"{self._refresh_form_prefix}&refresh_token={quote_plus(refresh_token)}".encode()
         
         headers = {
             "Content-Type": "application/x-www-form-urlencoded",
@@ -417,100 +480,95 @@ class OAuthService:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(token_url, data=data, headers=headers)
-                
-                if response.status_code != 200:
-                    error_detail = response.text
-                    logger.error(f"Token refresh failed: {response.status_code} - {error_detail}")
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Token refresh failed: {error_detail}"
-                    )
-                
-                token_data = response.json()
-                
-                # Validate response has required tokens - check both cases
-                access_token = token_data.get("access_token")
-                authorization_token = token_data.get("Authorization") or token_data.get("authorization")
-                
-                missing_fields = []
-                if not access_token:
-                    missing_fields.append("access_token")
-                if not authorization_token:
-                    missing_fields.append("Authorization/authorization")
-                
-                if missing_fields:
-                    logger.error(f"Missing token fields in refresh response: {missing_fields}")
-                    logger.error(f"Full refresh token response: {token_data}")
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Incomplete refresh response: missing {missing_fields}"
-                    )
-                
-                # Create normalized response
-                normalized_response = {
-                    "access_token": access_token,
-                    "Authorization": authorization_token,
-                    **{k: v for k, v in token_data.items() if k not in ["access_token", "Authorization", "authorization"]}
-                }
-                
-                logger.info("Token refresh exchange completed successfully")
-                return normalized_response
-                
+            client = await self._get_client()
+            response = await client.post(token_url, content=content, headers=headers)
+            
+            if response.status_code != 200:
+                error_detail = response.text
+                logger.error(f"Token refresh failed: {response.status_code} - {error_detail}")
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Token refresh failed: {error_detail}"
+                )
+            
+            token_data = orjson.loads(response.content)
+            
+            # Validate required tokens and normalize field names
+            try:
+                parsed = TokenResponse.model_validate(token_data)
+            except ValidationError as e:
+                missing_fields = [str(err["loc"][0]) for err in e.errors()]
+                logger.error(f"Missing token fields in refresh response: {missing_fields}")
+                logger.error(f"Full refresh token response: {token_data}")
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Incomplete refresh response: missing {missing_fields}"
+                )
+            
+            logger.info("Token refresh exchange completed successfully")
+            # Omit refresh_token when Zid did not rotate it
+            return parsed.model_dump(exclude_none=True)
+            
         except httpx.RequestError as e:
             logger.error(f"HTTP request failed during token refresh: {str(e)}")
             raise HTTPException(status_code=503, detail="OAuth service unavailable")
     
-    async def _update_tokens(self, credential: ZidCredential, token_response: Dict[str, Any]):
-        """Update existing credential with new tokens"""
+    async def _update_tokens(self, db: AsyncSession, credential_id: str,
+                             token_response: Dict[str, Any],
+                             expected_refresh_token: Optional[str] = None) -> Optional[ZidCredential]:
+        """
+        Update existing credential with new tokens and return the updated row (committed by the caller)
+        
+        With expected_refresh_token (the stored ciphertext that was exchanged), the update only
+        applies if the row still holds it; None is returned when another refresh got there first.
+        """
         # Calculate new expiration
-        expires_at = datetime.utcnow() + timedelta(seconds=token_response.get("expires_in", 31536000))
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=token_response.get("expires_in", 31536000))
         
-        # Encrypt new tokens
-        encrypted_access_token = await self.token_manager.encrypt_token(
-            token_response["access_token"]
-        )
-        encrypted_authorization_token = await self.token_manager.encrypt_token(
-            token_response["Authorization"]
-        )
+        tokens = {
+            "access_token": token_response["access_token"],
+            "authorization_token": token_response["Authorization"]
+        }
         
         # Update refresh token if provided (some OAuth providers issue new refresh tokens)
         if "refresh_token" in token_response:
-            encrypted_refresh_token = await self.token_manager.encrypt_token(
-                token_response["refresh_token"]
-            )
-            credential.refresh_token = encrypted_refresh_token
+            tokens["refresh_token"] = token_response["refresh_token"]
+        
+        # Encrypt new tokens
+        values = {
+            **self.token_manager.encrypt_tokens(tokens),
+            "expires_at": expires_at,
+            "updated_at": now,
+            "is_active": True
+        }
         
-        # Update tokens
-        credential.access_token = encrypted_access_token
-        credential.authorization_token = encrypted_authorization_token
-        credential.expires_at = expires_at
-        credential.updated_at = datetime.utcnow()
-        credential.is_active = True
+        # Write and read back the fresh row in one round-trip
+        stmt = update(ZidCredential).where(ZidCredential.id == credential_id)
+        if expected_refresh_token is not None:
+            stmt = stmt.where(ZidCredential.refresh_token == expected_refresh_token)
+        stmt = stmt.values(**values).returning(ZidCredential)
         
-        # Commit changes through the existing session
-        async with get_db() as db:
-            await db.merge(credential)
-            await db.commit()
+        result = await db.execute(stmt)
+        return result.scalar_one_or_none()
     
     async def _log_token_action(self, merchant_id: str, action: str, success: bool,
                                ip_address: Optional[str] = None, 
                                user_agent: Optional[str] = None,
                                error_message: Optional[str] = None):
         """Log token-related actions for audit trail"""
+        event = {
+            "merchant_id": merchant_id,
+            "action": action,
+            "success": success,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "error_message": error_message
+        }
         try:
-            async with get_db() as db:
-                audit_log = TokenAuditLog(
-                    merchant_id=merchant_id,
-                    action=action,
-                    success=success,
-                    ip_address=ip_address,
-                    user_agent=user_agent,
-                    error_message=error_message
-                )
-                db.add(audit_log)
-                await db.commit()
+            # Batched by the background flusher; fall back to a direct write if it isn't running
+            if not enqueue_audit(event):
+                await log_audit([event])
         except Exception as e:
             logger.error(f"Failed to log token action: {str(e)}")
             # Don't raise here - audit logging shouldn't break the flow
@@ -520,8 +578,8 @@ class OAuthService:
             "X-Manager-Token": manager_token,
             "Authorization": "Bearer " + auth_header
         }
-        async with httpx.AsyncClient() as client:
-            r = await client.get(f"{self.oauth_base_url}/v1/managers/account/profile", headers=headers)
+        client = await self._get_client()
+        r = await client.get(f"{self.oauth_base_url}/v1/managers/account/profile", headers=headers)
         if r.status_code != 200:
             logger.error(f"Failed to fetch store ID for credential {credential_id}: {r.text}")
             return
@@ -539,3 +597,13 @@ class OAuthService:
                 stmt = update(ZidCredential).where(ZidCredential.id == credential_id).values(store_id=store_id)
                 await db.execute(stmt)
                 await db.commit()
+
+# Process-wide service instance; its config and prefixes are static
+_oauth_service: Optional[OAuthService] = None
+
+def get_oauth_service() -> OAuthService:
+    """Return the shared OAuthService, creating it on first use"""
+    global _oauth_service
+    if _oauth_service is None:
+        _oauth_service = OAuthService()
+    return _oauth_service
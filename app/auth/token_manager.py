@@ -1,27 +1,32 @@
 import base64
 import logging
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Dict
 from cryptography.fernet import Fernet, InvalidToken
 
 from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
+def _get_fernet(encryption_key: str) -> Fernet:
+    """Build the Fernet instance once per process for the configured key"""
+    # Decode base64 encryption key
+    key_bytes = base64.b64decode(encryption_key.encode())
+    return Fernet(base64.urlsafe_b64encode(key_bytes[:32]))
+
 class TokenManager:
     """Secure token encryption and decryption for OAuth tokens"""
     
     def __init__(self):
         """Initialize with encryption key from settings"""
         try:
-            # Decode base64 encryption key
-            key_bytes = base64.b64decode(settings.encryption_key.encode())
-            self.fernet = Fernet(base64.urlsafe_b64encode(key_bytes[:32]))
-            logger.info("TokenManager initialized successfully")
+            self.fernet = _get_fernet(settings.encryption_key)
         except Exception as e:
             logger.error(f"Failed to initialize TokenManager: {str(e)}")
             raise ValueError("Invalid encryption key configuration")
     
-    async def encrypt_token(self, token: str) -> str:
+    def encrypt_token(self, token: str) -> str:
         """
         Encrypt a token for secure storage
         
@@ -29,28 +34,36 @@ class TokenManager:
             token: Plain text token to encrypt
             
         Returns:
-            Base64 encoded encrypted token
+            Fernet token (already urlsafe base64)
         """
         try:
             if not token:
                 raise ValueError("Token cannot be empty")
             
-            encrypted_bytes = self.fernet.encrypt(token.encode('utf-8'))
-            encrypted_token = base64.b64encode(encrypted_bytes).decode('utf-8')
-            
-            logger.debug("Token encrypted successfully")
-            return encrypted_token
+            return self.fernet.encrypt(token.encode('utf-8')).decode('ascii')
             
         except Exception as e:
             logger.error(f"Token encryption failed: {str(e)}")
             raise ValueError("Failed to encrypt token")
     
-    async def decrypt_token(self, encrypted_token: str) -> Optional[str]:
+    def encrypt_tokens(self, tokens: Dict[str, str]) -> Dict[str, str]:
+        """
+        Encrypt several tokens in one call
+        
+        Args:
+            tokens: Mapping of field name to plain text token
+            
+        Returns:
+            Mapping of the same field names to encrypted tokens
+        """
+        return {field: self.encrypt_token(token) for field, token in tokens.items()}
+    
+    def decrypt_token(self, encrypted_token: str) -> Optional[str]:
         """
         Decrypt a token from storage
         
         Args:
-            encrypted_token: Base64 encoded encrypted token
+            encrypted_token: Fernet token, or legacy base64-wrapped Fernet token
             
         Returns:
             Decrypted plain text token or None if decryption fails
@@ -59,12 +72,13 @@ class TokenManager:
             if not encrypted_token:
                 return None
             
-            encrypted_bytes = base64.b64decode(encrypted_token.encode('utf-8'))
-            decrypted_bytes = self.fernet.decrypt(encrypted_bytes)
-            token = decrypted_bytes.decode('utf-8')
-            
-            logger.debug("Token decrypted successfully")
-            return token
+            encrypted_bytes = encrypted_token.encode('ascii')
+            try:
+                decrypted_bytes = self.fernet.decrypt(encrypted_bytes)
+            except InvalidToken:
+                # Rows written before tokens were stored unwrapped are base64 of the Fernet token
+                decrypted_bytes = self.fernet.decrypt(base64.b64decode(encrypted_bytes))
+            return decrypted_bytes.decode('utf-8')
             
         except InvalidToken:
             logger.error("Token decryption failed: Invalid token or key")
@@ -73,7 +87,7 @@ class TokenManager:
             logger.error(f"Token decryption failed: {str(e)}")
             return None
     
-    async def verify_token_integrity(self, encrypted_token: str) -> bool:
+    def verify_token_integrity(self, encrypted_token: str) -> bool:
         """
         Verify if an encrypted token can be decrypted (integrity check)
         
@@ -84,7 +98,7 @@ class TokenManager:
             True if token is valid and can be decrypted
         """
         try:
-            decrypted = await self.decrypt_token(encrypted_token)
+            decrypted = self.decrypt_token(encrypted_token)
             return decrypted is not None
         except Exception:
             return False
\ No newline at end of file
@@ -1,7 +1,11 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import text
 from contextlib import asynccontextmanager
+from datetime import datetime
 import logging
+import re
+import ssl
 
 from .config import settings
 
@@ -14,17 +18,45 @@ database_url = settings.database_url
 if database_url.startswith("postgresql://"):
     database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
 
-# Handle SSL mode for asyncpg - remove sslmode parameter and add ssl='require' as connect_args
-connect_args = {}
-if "sslmode=require" in database_url:
-    database_url = database_url.replace("?sslmode=require", "").replace("&sslmode=require", "")
-    connect_args["ssl"] = "require"
+# Short OLTP queries never benefit from JIT compilation; TCP keepalives detect
+# dead connections without a pre-ping round trip on every checkout
+connect_args = {
+    "server_settings": {
+        "jit": "off",
+        "tcp_keepalives_idle": "30",
+        "tcp_keepalives_interval": "10",
+        "tcp_keepalives_count": "3",
+    },
+    # Keep prepared statements per connection so hot queries skip server-side parsing
+    "statement_cache_size": settings.db_statement_cache_size,
+    "prepared_statement_cache_size": settings.db_statement_cache_size,
+}
+
+# asyncpg does not understand libpq's sslmode URL parameter; translate it to an SSL context
+_SSLMODE_PARAM = re.compile(r"sslmode=([^&]*)&?")
+_sslmode = _SSLMODE_PARAM.search(database_url)
+if _sslmode:
+    database_url = _SSLMODE_PARAM.sub("", database_url).rstrip("?&")
+    sslmode = _sslmode.group(1)
+    if sslmode in ("require", "verify-ca", "verify-full"):
+        # "require" only encrypts, "verify-ca" checks the CA, "verify-full" also the hostname
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = sslmode == "verify-full"
+        if sslmode == "require":
+            ssl_context.verify_mode = ssl.CERT_NONE
+        connect_args["ssl"] = ssl_context
 
 engine = create_async_engine(
     database_url,
-    echo=settings.env == "development",
-    pool_pre_ping=True,
-    pool_recycle=300,
+    # SQL echo formats and logs every statement; only pay for it when debugging
+    echo=settings.log_level.upper() == "DEBUG",
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_recycle=settings.db_pool_recycle,
+    # Batch multi-row INSERTs (e.g. audit logs) into as few statements as possible
+    insertmanyvalues_page_size=1000,
     connect_args=connect_args,
 )
 
@@ -35,8 +67,28 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Small dedicated pool for audit log writes so they never compete with OAuth traffic
+audit_engine = create_async_engine(
+    database_url,
+    echo=False,
+    pool_size=settings.audit_db_pool_size,
+    max_overflow=settings.audit_db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_recycle=settings.db_pool_recycle,
+    insertmanyvalues_page_size=1000,
+    connect_args=connect_args,
+)
+
+AuditSessionLocal = async_sessionmaker(
+    audit_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 # Base class for models
-Base = declarative_base()
+class Base(DeclarativeBase):
+    pass
 
 @asynccontextmanager
 async def get_db():
@@ -51,6 +103,19 @@ async def get_db():
         finally:
             await session.close()
 
+@asynccontextmanager
+async def get_audit_db():
+    """Database session context manager on the dedicated audit pool"""
+    async with AuditSessionLocal() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
 async def get_db_session():
     """FastAPI dependency for database sessions"""
     async with get_db() as session:
@@ -66,12 +131,59 @@ async def init_db():
             # Create all tables
             await conn.run_sync(Base.metadata.create_all)
         
+        # token_audit_logs is created as a bare partitioned parent; inserts need partitions
+        await ensure_audit_log_partitions()
+        
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Database initialization failed: {str(e)}")
         raise
 
+def _next_month(month: datetime) -> datetime:
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+async def ensure_audit_log_partitions(months_ahead: int = 3):
+    """
+    Create monthly token_audit_logs partitions for the current and upcoming months
+    
+    Runs from the pre-deploy job (python -m app.maintenance) rather than on worker
+    start. Rows that already landed in the default partition for a missing month are
+    moved into the new partition, and any failure is raised to the caller.
+    """
+    month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS token_audit_logs_default PARTITION OF token_audit_logs DEFAULT"
+        ))
+    
+    for _ in range(months_ahead + 1):
+        upper = _next_month(month)
+        name = f"token_audit_logs_{month:%Y_%m}"
+        bounds = f"FROM ('{month:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+        
+        # One transaction per month: build the table detached, pull the month's rows
+        # out of the default partition, then attach it so the bounds never overlap
+        async with engine.begin() as conn:
+            exists = (await conn.execute(text("SELECT to_regclass(:name)"), {"name": name})).scalar()
+            if exists is None:
+                await conn.execute(text(
+                    f"CREATE TABLE {name} (LIKE token_audit_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                ))
+                moved = await conn.execute(text(
+                    f"WITH moved AS (DELETE FROM token_audit_logs_default "
+                    f"WHERE timestamp >= '{month:%Y-%m-%d}' AND timestamp < '{upper:%Y-%m-%d}' RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"
+                ))
+                await conn.execute(text(f"ALTER TABLE token_audit_logs ATTACH PARTITION {name} FOR VALUES {bounds}"))
+                logger.info(f"Created audit log partition {name} ({moved.rowcount} rows moved from default)")
+        
+        month = upper
+
 async def close_db():
     """Close database connections"""
     await engine.dispose()
+    await audit_engine.dispose()
     logger.info("Database connections closed")
\ No newline at end of file
@@ -1,13 +1,22 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+import asyncio
+import orjson
 import logging
 import os
 from contextlib import asynccontextmanager
+from alembic import command
+from alembic.config import Config
 
 from .config import settings
-from .database import init_db, close_db
+from .database import init_db, close_db, ensure_audit_log_partitions
+from .api.zid_client import ZidAPIClient
+from .auth.oauth_service import OAuthService
+from .services.audit_log import start_audit_flusher, stop_audit_flusher
+from .services.state_cleanup import start_state_cleanup, stop_state_cleanup
+from .services.response_cache import close_response_cache
 
 # Configure logging
 logging.basicConfig(
@@ -17,37 +26,53 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+def _run_migrations():
+    """Upgrade the database to the latest Alembic revision in this process"""
+    config = Config("alembic.ini")
+    # Keep the application's logging configuration instead of alembic.ini's
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan management"""
     logger.info("Starting Zid Integration Service...")
     
-    # Run database migrations
-    try:
-        import subprocess
-        logger.info("Running database migrations...")
-        result = subprocess.run(["alembic", "upgrade", "head"], 
-                              capture_output=True, text=True, cwd=".")
-        if result.returncode != 0:
-            logger.error(f"Migration failed: {result.stderr}")
-            raise Exception(f"Database migration failed: {result.stderr}")
-        logger.info("Database migrations completed successfully")
-    except Exception as e:
-        logger.error(f"Failed to run migrations: {str(e)}")
-        # Don't fail startup - try to initialize tables directly
-        await init_db()
-        logger.info("Database initialized with direct table creation")
+    # Run database migrations (skipped when a separate migration job owns the schema)
+    if settings.run_migrations_on_startup:
+        try:
+            logger.info("Running database migrations...")
+            # Alembic's env.py is synchronous, so run it off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, _run_migrations)
+            await ensure_audit_log_partitions()
+            logger.info("Database migrations completed successfully")
+        except Exception as e:
+            logger.error(f"Failed to run migrations: {str(e)}")
+            # Don't fail startup - in development, initialize tables directly
+            if settings.env == "development":
+                await init_db()
+                logger.info("Database initialized with direct table creation")
+    
+    start_audit_flusher()
+    start_state_cleanup()
     
     yield
     
     logger.info("Shutting down Zid Integration Service...")
+    await ZidAPIClient.aclose()
+    await OAuthService.aclose()
+    await close_response_cache()
+    await stop_state_cleanup()
+    await stop_audit_flusher()
     await close_db()
 
 app = FastAPI(
     title="Zid Integration Service",
     description="OAuth 2.0 authentication and API integration service for Zid e-commerce platform",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Zid product/order listings can be large; serialize them with orjson
+    default_response_class=ORJSONResponse
 )
 
 # Security middleware
@@ -56,13 +81,19 @@ app.add_middleware(
     allowed_hosts=["*"]  # TODO: Configure for production
 )
 
-# CORS middleware
+# An empty list blocks every cross-origin browser call; refuse to start that way in production
+if settings.env == "production" and not settings.cors_origins:
+    raise RuntimeError("CORS_ORIGINS must list the allowed origins when ENV=production")
+
+# CORS middleware; a wildcard origin never gets credentials, since Starlette would
+# echo back any requesting origin
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # TODO: Configure for production
-    allow_credentials=True,
+    allow_origins=settings.cors_origins,
+    allow_credentials="*" not in settings.cors_origins,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=settings.cors_max_age,
 )
 
 # Include routers
@@ -99,14 +130,17 @@ async def root():
         }
     }
 
+# Probes hit this several times per second; serialize the static body once
+_HEALTH_BODY = orjson.dumps({
+    "status": "healthy",
+    "service": "zid-integration-service",
+    "phase": "infrastructure-ready"
+})
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for Docker and DigitalOcean"""
-    return {
-        "status": "healthy",
-        "service": "zid-integration-service",
-        "phase": "infrastructure-ready"
-    }
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,21 @@
+"""
+Out-of-band database maintenance, run by the pre-deploy job:
+
+    python -m app.maintenance
+
+Exits non-zero on failure so a deploy never proceeds without its partitions.
+"""
+import asyncio
+import logging
+
+from .database import ensure_audit_log_partitions, close_db
+
+async def main():
+    try:
+        await ensure_audit_log_partitions()
+    finally:
+        await close_db()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Index
+from typing import Optional
+from sqlalchemy import Integer, String, DateTime, Boolean, Text, Index, LargeBinary, text
+from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
 import uuid
 from ..database import Base
@@ -7,26 +9,27 @@ class ZidCredential(Base):
     """Secure storage for Zid OAuth credentials with encryption at rest"""
     __tablename__ = "zid_credentials"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    merchant_id = Column(String, nullable=False, unique=True, index=True)
-    store_id = Column(Integer, nullable=True, index=True)  # or nullable=False if you’ve backfilled
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    merchant_id: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    store_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # or nullable=False if you’ve backfilled
     
     # Encrypted tokens (stored as base64 encrypted strings)
-    access_token = Column(Text, nullable=False)        # For X-MANAGER-TOKEN header
-    authorization_token = Column(Text, nullable=False)  # For Authorization Bearer header
-    refresh_token = Column(Text, nullable=False)       # For token refresh
+    access_token: Mapped[str] = mapped_column(Text, nullable=False)        # For X-MANAGER-TOKEN header
+    authorization_token: Mapped[str] = mapped_column(Text, nullable=False)  # For Authorization Bearer header
+    refresh_token: Mapped[str] = mapped_column(Text, nullable=False)       # For token refresh
     
     # Token metadata
-    expires_at = Column(DateTime, nullable=False)
-    is_active = Column(Boolean, default=True, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     
     # Audit fields
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
     # Database indexes for performance
     __table_args__ = (
-        Index('idx_merchant_active', 'merchant_id', 'is_active'),
+        Index('idx_zid_cred_active_merchant', 'merchant_id', unique=True,
+              postgresql_where=text('is_active')),
         Index('idx_expires_at', 'expires_at'),
         Index('idx_zid_credentials_store_id', 'store_id'),
     )
@@ -35,40 +38,45 @@ class OAuthState(Base):
     """OAuth state parameter management for security"""
     __tablename__ = "oauth_states"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    state_hash = Column(String, nullable=False, unique=True, index=True)
-    merchant_id = Column(String, nullable=False)
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    state_hash: Mapped[bytes] = mapped_column(LargeBinary(32), nullable=False)  # Raw SHA-256 digest
+    merchant_id: Mapped[str] = mapped_column(String, nullable=False)
     
     # State lifecycle
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    expires_at = Column(DateTime, nullable=False)
-    used = Column(Boolean, default=False, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    used: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     
     # Database indexes
     __table_args__ = (
-        Index('idx_state_expires', 'state_hash', 'expires_at'),
-        Index('idx_expires_cleanup', 'expires_at'),
+        Index('idx_oauth_states_hash', 'state_hash', postgresql_using='hash',
+              postgresql_where=text('used = false')),
+        Index('idx_oauth_states_unused_expires', 'expires_at',
+              postgresql_where=text('used = false')),
+        Index('idx_oauth_states_used', 'expires_at',
+              postgresql_where=text('used = true')),
     )
 
 class TokenAuditLog(Base):
-    """Comprehensive audit logging for token operations"""
+    """Comprehensive audit logging for token operations (partitioned monthly by timestamp)"""
     __tablename__ = "token_audit_logs"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    merchant_id = Column(String, nullable=False, index=True)
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    merchant_id: Mapped[str] = mapped_column(String, nullable=False)
     
     # Action tracking
-    action = Column(String, nullable=False)  # 'created', 'refreshed', 'revoked', 'expired'
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
-    success = Column(Boolean, nullable=False)
-    error_message = Column(Text, nullable=True)
+    action: Mapped[str] = mapped_column(String, nullable=False)  # 'created', 'refreshed', 'revoked', 'expired'
+    timestamp: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False)  # Partition key
+    success: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     # Request context
-    ip_address = Column(String, nullable=True)
-    user_agent = Column(String, nullable=True)
+    ip_address: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    user_agent: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     
     # Database indexes
     __table_args__ = (
-        Index('idx_merchant_timestamp', 'merchant_id', 'timestamp'),
-        Index('idx_action_timestamp', 'action', 'timestamp'),
-    )
\ No newline at end of file
+        Index('idx_tal_merchant_time', merchant_id.column, timestamp.column.desc()),
+        Index('idx_tal_action_time', action.column, timestamp.column.desc()),
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
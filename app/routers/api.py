@@ -1,12 +1,16 @@
-from typing import Optional
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from typing import Optional, List, Dict, Any, Literal
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field
 import logging
 
-from ..api.zid_client import ZidAPIClient
-from ..models.database import ZidCredential, OAuthState, TokenAuditLog
+from ..api.zid_client import get_zid_client, invalidate_zid_credentials
+from ..models.database import ZidCredential, TokenAuditLog
 from ..database import get_db
-from sqlalchemy import select, delete
+from ..services.state_cleanup import delete_stale_oauth_states
+from ..services.response_cache import cached, purge_merchant_cache
+from sqlalchemy import select, delete, func
 
 logger = logging.getLogger(__name__)
 
@@ -29,35 +33,152 @@ class TokenValidationResponse(BaseModel):
     last_updated: Optional[str] = None
     error: Optional[str] = None
 
+# Response models for the list endpoints; validated and serialized by pydantic-core
+# instead of FastAPI's jsonable_encoder. Zid payload items are passed through as-is.
+class Pagination(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
+    page: int
+    limit: int
+    total_count: int
+    total_pages: int
+    has_next: bool
+    has_prev: bool
+
+class ListResponse(BaseModel):
+    success: bool
+    merchant_id: str
+    pagination: Optional[Pagination] = None
+    # Only present with debug=true
+    filters_applied: Optional[Dict[str, Any]] = None
+    sorting: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = None
+    # Set when a stale cached response is served because Zid failed
+    cache_fallback: Optional[bool] = None
+
+class OrdersResponse(ListResponse):
+    orders: List[Dict[str, Any]]
+    expanded: Optional[Dict[str, Dict[str, Any]]] = None
+
+class CustomersResponse(ListResponse):
+    customers: List[Dict[str, Any]]
+
+class CategoriesResponse(ListResponse):
+    categories: List[Dict[str, Any]]
+    structure_options: Optional[Dict[str, Any]] = None
+
+class ProductsResponse(ListResponse):
+    products: List[Dict[str, Any]]
+    count: Optional[int] = None
+    next: Optional[str] = None
+    previous: Optional[str] = None
+
+SortOrder = Literal["asc", "desc"]
+
+def _filter_params(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the filters that were provided (None and empty strings are skipped)"""
+    return {name: value for name, value in filters.items() if value not in (None, "")}
+
+class BatchRequest(BaseModel):
+    ids: List[str] = Field(min_length=1, max_length=100)
+
+async def _batch_get(client, path_fmt: str, key: str, ids: List[str], concurrency: int = 10) -> Dict[str, Any]:
+    """Fetch detail resources concurrently (deduplicated, at most `concurrency` in flight)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def fetch(item_id: str):
+        async with semaphore:
+            data = await client.get(path_fmt.format(item_id))
+        return data.get(key, data) if data else None
+    
+    ids = list(dict.fromkeys(ids))
+    results = await asyncio.gather(*(fetch(item_id) for item_id in ids))
+    return dict(zip(ids, results))
+
+# Detail calls share the merchant's 120/min budget, so expansion is bounded per request
+MAX_EXPAND_IDS = 50
+
+class _ExpandTooLarge(Exception):
+    """A page of orders references more related resources than one request may expand"""
+
+async def _expand_orders(client, orders: List[Dict[str, Any]], expand: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch the customers and/or products referenced by a page of orders, concurrently"""
+    wanted = {}
+    if "customers" in expand:
+        ids = [str(o["customer"]["id"]) for o in orders if (o.get("customer") or {}).get("id") is not None]
+        wanted["customers"] = ("/v1/managers/customers/{}", "customer", list(dict.fromkeys(ids)))
+    if "products" in expand:
+        ids = [str(p["id"]) for o in orders for p in o.get("products") or [] if p.get("id") is not None]
+        wanted["products"] = ("/v1/managers/store/products/{}", "product", list(dict.fromkeys(ids)))
+    
+    total = sum(len(ids) for _, _, ids in wanted.values())
+    if total > MAX_EXPAND_IDS:
+        raise _ExpandTooLarge(
+            f"expand would fetch {total} related resources; at most {MAX_EXPAND_IDS} "
+            "per request, lower limit or narrow expand"
+        )
+    
+    lookups = {name: _batch_get(client, *args) for name, args in wanted.items()}
+    results = await asyncio.gather(*lookups.values())
+    return dict(zip(lookups.keys(), results))
+
+async def _batch_response(merchant_id: str, path_fmt: str, key: str, ids: List[str]) -> Dict[str, Any]:
+    try:
+        client = get_zid_client(merchant_id)
+        items = await _batch_get(client, path_fmt, key, ids)
+        
+        logger.info(f"Batch fetched {len(items)} {key}s for merchant {merchant_id}")
+        return {
+            "success": True,
+            "merchant_id": merchant_id,
+            "items": {item_id: item for item_id, item in items.items() if item is not None},
+            "missing": [item_id for item_id, item in items.items() if item is None]
+        }
+    except Exception as e:
+        logger.error(f"Batch {key} request failed for merchant {merchant_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch {key} request failed: {str(e)}")
+
 @router.get("/merchants")
-async def list_merchants():
+async def list_merchants(
+    limit: int = Query(default=100, ge=1, le=1000, description="Merchants per page"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page")
+):
     """
-    List all stored merchant credentials
+    List stored merchant credentials, ordered by merchant ID
+    
+    Args:
+        limit: Merchants per page (max 1000)
+        cursor: Merchant ID to continue after (next_cursor of the previous page)
     
     Returns:
-        List of merchants with their credential status
+        A page of merchants (count) with their credential status, the total number
+        of stored merchants (total_merchants) and the cursor for the next page
     """
     try:
         async with get_db() as db:
-            stmt = select(ZidCredential)
+            # Plain column rows: no ORM instances and no encrypted token columns
+            stmt = select(
+                ZidCredential.merchant_id,
+                ZidCredential.id.label("credential_id"),
+                ZidCredential.is_active,
+                ZidCredential.expires_at,
+                ZidCredential.created_at,
+                ZidCredential.updated_at
+            ).order_by(ZidCredential.merchant_id).limit(limit)
+            if cursor:
+                # Keyset pagination on the unique merchant_id index
+                stmt = stmt.where(ZidCredential.merchant_id > cursor)
             result = await db.execute(stmt)
-            credentials = result.scalars().all()
-            
-            merchants = []
-            for cred in credentials:
-                merchants.append({
-                    "merchant_id": cred.merchant_id,
-                    "credential_id": cred.id,
-                    "is_active": cred.is_active,
-                    "expires_at": cred.expires_at.isoformat() if cred.expires_at else None,
-                    "created_at": cred.created_at.isoformat() if cred.created_at else None,
-                    "updated_at": cred.updated_at.isoformat() if cred.updated_at else None
-                })
-            
-            return {
-                "total_merchants": len(merchants),
-                "merchants": merchants
-            }
+            merchants = [dict(row) for row in result.mappings()]
+            total = await db.scalar(select(func.count()).select_from(ZidCredential))
+        
+        # orjson writes the datetimes as ISO 8601 directly; skip jsonable_encoder
+        return ORJSONResponse({
+            "total_merchants": total,
+            "count": len(merchants),
+            "merchants": merchants,
+            "next_cursor": merchants[-1]["merchant_id"] if len(merchants) == limit else None
+        })
             
     except Exception as e:
         logger.error(f"Failed to list merchants: {str(e)}")
@@ -76,21 +197,22 @@ async def delete_merchant(merchant_id: str):
     """
     try:
         async with get_db() as db:
-            # Find the merchant credential
-            stmt = select(ZidCredential).where(ZidCredential.merchant_id == merchant_id)
+            # Delete the credential (rolled back with the session if nothing matched)
+            stmt = delete(ZidCredential).where(
+                ZidCredential.merchant_id == merchant_id
+            ).returning(ZidCredential.id)
             result = await db.execute(stmt)
-            credential = result.scalar_one_or_none()
             
-            if not credential:
+            if result.scalar_one_or_none() is None:
                 raise HTTPException(status_code=404, detail=f"Merchant {merchant_id} not found")
             
             # Delete associated audit logs
             audit_stmt = delete(TokenAuditLog).where(TokenAuditLog.merchant_id == merchant_id)
             await db.execute(audit_stmt)
             
-            # Delete the credential
-            await db.delete(credential)
             await db.commit()
+            invalidate_zid_credentials(merchant_id)
+            await purge_merchant_cache(merchant_id)
             
             logger.info(f"Deleted merchant {merchant_id} and all associated data")
             
@@ -115,31 +237,24 @@ async def cleanup_old_data():
         Cleanup results
     """
     try:
-        from datetime import datetime
+        # Same bulk DELETE the background cleanup task runs
+        deleted = await delete_stale_oauth_states()
         
-        async with get_db() as db:
-            # Delete old/expired OAuth states
-            oauth_stmt = delete(OAuthState).where(
-                OAuthState.expires_at < datetime.utcnow()
-            )
-            oauth_result = await db.execute(oauth_stmt)
-            
-            await db.commit()
-            
-            cleanup_result = {
-                "success": True,
-                "expired_oauth_states_deleted": oauth_result.rowcount,
-                "message": "Cleanup completed successfully"
-            }
-            
-            logger.info(f"Cleanup completed: {cleanup_result}")
-            return cleanup_result
+        cleanup_result = {
+            "success": True,
+            "expired_oauth_states_deleted": deleted,
+            "message": "Cleanup completed successfully"
+        }
+        
+        logger.info(f"Cleanup completed: {cleanup_result}")
+        return cleanup_result
             
     except Exception as e:
         logger.error(f"Cleanup failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Cleanup failed: {str(e)}")
 
-@router.get("/products/{merchant_id}")
+@router.get("/products/{merchant_id}", response_model=ProductsResponse, response_model_exclude_unset=True)
+@cached("short")
 async def get_products(merchant_id: str, page: int = 1, limit: int = 10, search: Optional[str] = None):
     """
     Retrieve a list of products for the given merchant.
@@ -168,7 +283,7 @@ async def get_products(merchant_id: str, page: int = 1, limit: int = 10, search:
         - User-Agent: ZidIntegration/1.0.0 (Merchant: {merchant_id})
     """
     try:
-        client = ZidAPIClient(merchant_id)
+        client = get_zid_client(merchant_id)
         params = {
             "page": page,
             "page_size": min(limit, 50),
@@ -190,7 +305,52 @@ async def get_products(merchant_id: str, page: int = 1, limit: int = 10, search:
         logger.error(f"Failed to get products for merchant {merchant_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Products request failed")
 
-@router.get("/orders/{merchant_id}")
+@router.get("/bootstrap/{merchant_id}")
+async def get_bootstrap(merchant_id: str, limit: int = 10):
+    """
+    Token status, merchant profile and the first page of products in one call
+
+    Loads the merchant credential once and runs both Zid requests concurrently,
+    saving clients the usual validate -> profile -> products round trips.
+
+    Args:
+        merchant_id: The merchant identifier
+        limit: Products per page (default: 10, max: 50)
+
+    Returns:
+        Token validation result, merchant profile and products
+    """
+    try:
+        client = get_zid_client(merchant_id)
+        
+        # Validation loads the credential, so the concurrent requests below share it
+        validation = await client.validate_tokens()
+        if not validation.get("valid"):
+            raise HTTPException(status_code=404, detail=validation.get("error", "Merchant credentials not valid"))
+        
+        profile, products = await asyncio.gather(
+            client.get("/managers/account/profile"),
+            client.get("/v1/products/", params={"page": 1, "page_size": min(limit, 50)})
+        )
+        products = products or {}
+
+        return {
+            "success": True,
+            "merchant_id": merchant_id,
+            "tokens": validation,
+            "profile": profile,
+            "products": products.get("results", []),
+            "count": products.get("count"),
+            "next": products.get("next")
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Bootstrap failed for merchant {merchant_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Bootstrap request failed")
+
+@router.get("/orders/{merchant_id}", response_model=OrdersResponse, response_model_exclude_unset=True)
+@cached("short")
 async def get_orders(
     merchant_id: str,
     # Pagination
@@ -216,7 +376,10 @@ async def get_orders(
     order_number: Optional[str] = Query(default=None, description="Search by specific order number"),
     # Sorting
     sort_by: str = Query(default="created_at", description="Sort by: created_at, updated_at, total_amount, order_number"),
-    sort_order: str = Query(default="desc", regex="^(asc|desc)$", description="Sort order: asc or desc")
+    sort_order: SortOrder = Query(default="desc", description="Sort order: asc or desc"),
+    debug: bool = Query(default=False, description="Echo applied filters, sorting and result metadata"),
+    # Enrichment
+    expand: Optional[str] = Query(default=None, description=f"Comma-separated related resources to embed: customers, products (at most {MAX_EXPAND_IDS} distinct IDs in total)")
 ):
     """
     Get orders list with comprehensive filtering and search capabilities
@@ -236,12 +399,15 @@ async def get_orders(
         order_number: Specific order lookup
         sort_by: Field to sort by
         sort_order: Sorting direction
+        debug: Include filters_applied, sorting and metadata blocks
+        expand: Related customers/products to fetch and embed under "expanded";
+            400 if the page references more than MAX_EXPAND_IDS of them
         
     Returns:
         Enhanced orders list with metadata from Zid API
     """
     try:
-        client = ZidAPIClient(merchant_id)
+        client = get_zid_client(merchant_id)
         
         # Build query parameters for Zid API
         params = {
@@ -252,30 +418,22 @@ async def get_orders(
         }
         
         # Add filtering parameters
-        if status:
-            params["status"] = status
-        if payment_status:
-            params["payment_status"] = payment_status
-        if fulfillment_status:
-            params["fulfillment_status"] = fulfillment_status
+        params.update(_filter_params({
+            "status": status,
+            "payment_status": payment_status,
+            "fulfillment_status": fulfillment_status,
+            "customer_id": customer_id,
+            "customer_email": customer_email,
+            "customer_phone": customer_phone,
+            "min_amount": min_amount,
+            "max_amount": max_amount,
+            "search": search,
+            "order_number": order_number
+        }))
         if date_from:
             params[f"{date_field}_from"] = date_from
         if date_to:
             params[f"{date_field}_to"] = date_to
-        if customer_id is not None:
-            params["customer_id"] = customer_id
-        if customer_email:
-            params["customer_email"] = customer_email
-        if customer_phone:
-            params["customer_phone"] = customer_phone
-        if min_amount is not None:
-            params["min_amount"] = min_amount
-        if max_amount is not None:
-            params["max_amount"] = max_amount
-        if search:
-            params["search"] = search
-        if order_number:
-            params["order_number"] = order_number
         
         logger.info(f"Fetching orders for merchant {merchant_id} with filters: {params}")
         
@@ -299,47 +457,72 @@ async def get_orders(
                     "total_pages": (total_count + limit - 1) // limit if total_count > 0 else 0,
                     "has_next": page * limit < total_count,
                     "has_prev": page > 1
-                },
-                "filters_applied": {
-                    "status": status,
-                    "payment_status": payment_status,
-                    "fulfillment_status": fulfillment_status,
-                    "date_range": {
-                        "field": date_field,
-                        "from": date_from,
-                        "to": date_to
-                    } if date_from or date_to else None,
-                    "customer": {
-                        "id": customer_id,
-                        "email": customer_email,
-                        "phone": customer_phone
-                    } if customer_id or customer_email or customer_phone else None,
-                    "amount_range": {"min": min_amount, "max": max_amount} if min_amount or max_amount else None,
-                    "search": search,
-                    "order_number": order_number
-                },
-                "sorting": {
-                    "sort_by": sort_by,
-                    "sort_order": sort_order
-                },
-                "metadata": {
-                    "results_count": len(orders_list),
-                    "total_orders": total_count
                 }
             }
             
+            if expand:
+                response["expanded"] = await _expand_orders(client, orders_list, expand.split(","))
+            
+            # Echoes of the request parameters are only useful when debugging
+            if debug:
+                response.update({
+                    "filters_applied": {
+                        "status": status,
+                        "payment_status": payment_status,
+                        "fulfillment_status": fulfillment_status,
+                        "date_range": {
+                            "field": date_field,
+                            "from": date_from,
+                            "to": date_to
+                        } if date_from or date_to else None,
+                        "customer": {
+                            "id": customer_id,
+                            "email": customer_email,
+                            "phone": customer_phone
+                        } if customer_id or customer_email or customer_phone else None,
+                        "amount_range": {"min": min_amount, "max": max_amount} if min_amount or max_amount else None,
+                        "search": search,
+                        "order_number": order_number
+                    },
+                    "sorting": {
+                        "sort_by": sort_by,
+                        "sort_order": sort_order
+                    },
+                    "metadata": {
+                        "results_count": len(orders_list),
+                        "total_orders": total_count
+                    }
+                })
+            
             logger.info(f"Orders retrieved successfully for merchant {merchant_id}: {len(orders_list)} items")
             return response
             
         else:
             raise HTTPException(status_code=400, detail="Failed to retrieve orders")
             
+    except _ExpandTooLarge as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Orders request failed for merchant {merchant_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Orders request failed: {str(e)}")
 
+@router.post("/products/{merchant_id}/batch")
+async def get_products_batch(merchant_id: str, request: BatchRequest):
+    """
+    Get several products by ID in one call
+    
+    Args:
+        merchant_id: Merchant identifier
+        request: Product IDs (up to 100, duplicates ignored)
+        
+    Returns:
+        Products keyed by ID, plus the IDs Zid did not return
+    """
+    return await _batch_response(merchant_id, "/v1/managers/store/products/{}", "product", request.ids)
+
 @router.get("/products/{merchant_id}/{product_id}")
-async def get_product_by_id(merchant_id: str, product_id: str):
+@cached("short", etag=True)
+async def get_product_by_id(merchant_id: str, product_id: str, request: Request):
     """
     Get a single product by ID with complete details
     
@@ -351,7 +534,7 @@ async def get_product_by_id(merchant_id: str, product_id: str):
         Complete product information from Zid API
     """
     try:
-        client = ZidAPIClient(merchant_id)
+        client = get_zid_client(merchant_id)
         
         logger.info(f"Fetching product {product_id} for merchant {merchant_id}")
         
@@ -376,8 +559,23 @@ async def get_product_by_id(merchant_id: str, product_id: str):
         logger.error(f"Product {product_id} request failed for merchant {merchant_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Product request failed: {str(e)}")
 
+@router.post("/orders/{merchant_id}/batch")
+async def get_orders_batch(merchant_id: str, request: BatchRequest):
+    """
+    Get several orders by ID in one call
+    
+    Args:
+        merchant_id: Merchant identifier
+        request: Order IDs (up to 100, duplicates ignored)
+        
+    Returns:
+        Orders keyed by ID, plus the IDs Zid did not return
+    """
+    return await _batch_response(merchant_id, "/v1/managers/orders/{}", "order", request.ids)
+
 @router.get("/orders/{merchant_id}/{order_id}")
-async def get_order_by_id(merchant_id: str, order_id: str):
+@cached("short", etag=True)
+async def get_order_by_id(merchant_id: str, order_id: str, request: Request):
     """
     Get a single order by ID with complete details
     
@@ -389,7 +587,7 @@ async def get_order_by_id(merchant_id: str, order_id: str):
         Complete order information from Zid API
     """
     try:
-        client = ZidAPIClient(merchant_id)
+        client = get_zid_client(merchant_id)
         
         logger.info(f"Fetching order {order_id} for merchant {merchant_id}")
         
@@ -414,7 +612,8 @@ async def get_order_by_id(merchant_id: str, order_id: str):
         logger.error(f"Order {order_id} request failed for merchant {merchant_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Order request failed: {str(e)}")
 
-@router.get("/customers/{merchant_id}")
+@router.get("/customers/{merchant_id}", response_model=CustomersResponse, response_model_exclude_unset=True)
+@cached("normal")
 async def get_customers(
     merchant_id: str,
     # Pagination
@@ -430,7 +629,8 @@ async def get_customers(
     registered_to: Optional[str] = Query(default=None, description="Customer registration end date (YYYY-MM-DD)"),
     # Sorting
     sort_by: str = Query(default="created_at", description="Sort by: created_at, updated_at, name, email"),
-    sort_order: str = Query(default="desc", regex="^(asc|desc)$", description="Sort order: asc or desc")
+    sort_order: SortOrder = Query(default="desc", description="Sort order: asc or desc"),
+    debug: bool = Query(default=False, description="Echo applied filters, sorting and result metadata")
 ):
     """
     Get customers list with filtering and search capabilities
@@ -445,12 +645,13 @@ async def get_customers(
         registered_from/to: Registration date range
         sort_by: Field to sort by
         sort_order: Sorting direction
+        debug: Include filters_applied, sorting and metadata blocks
         
     Returns:
         Customers list with metadata from Zid API
     """
     try:
-        client = ZidAPIClient(merchant_id)
+        client = get_zid_client(merchant_id)
         
         # Build query parameters for Zid API
         params = {
@@ -461,18 +662,14 @@ async def get_customers(
         }
         
         # Add filtering parameters
-        if search:
-            params["search"] = search
-        if email:
-            params["email"] = email
-        if phone:
-            params["phone"] = phone
-        if status:
-            params["status"] = status
-        if registered_from:
-            params["registered_from"] = registered_from
-        if registered_to:
-            params["registered_to"] = registered_to
+        params.update(_filter_params({
+            "search": search,
+            "email": email,
+            "phone": phone,
+            "status": status,
+            "registered_from": registered_from,
+            "registered_to": registered_to
+        }))
         
         logger.info(f"Fetching customers for merchant {merchant_id} with filters: {params}")
         
@@ -496,27 +693,32 @@ async def get_customers(
                     "total_pages": (total_count + limit - 1) // limit if total_count > 0 else 0,
                     "has_next": page * limit < total_count,
                     "has_prev": page > 1
-                },
-                "filters_applied": {
-                    "search": search,
-                    "email": email,
-                    "phone": phone,
-                    "status": status,
-                    "registration_date_range": {
-                        "from": registered_from,
-                        "to": registered_to
-                    } if registered_from or registered_to else None
-                },
-                "sorting": {
-                    "sort_by": sort_by,
-                    "sort_order": sort_order
-                },
-                "metadata": {
-                    "results_count": len(customers_list),
-                    "total_customers": total_count
                 }
             }
             
+            # Echoes of the request parameters are only useful when debugging
+            if debug:
+                response.update({
+                    "filters_applied": {
+                        "search": search,
+                        "email": email,
+                        "phone": phone,
+                        "status": status,
+                        "registration_date_range": {
+                            "from": registered_from,
+                            "to": registered_to
+                        } if registered_from or registered_to else None
+                    },
+                    "sorting": {
+                        "sort_by": sort_by,
+                        "sort_order": sort_order
+                    },
+                    "metadata": {
+                        "results_count": len(customers_list),
+                        "total_customers": total_count
+                    }
+                })
+            
             logger.info(f"Customers retrieved successfully for merchant {merchant_id}: {len(customers_list)} items")
             return response
             
@@ -527,7 +729,8 @@ async def get_customers(
         logger.error(f"Customers request failed for merchant {merchant_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Customers request failed: {str(e)}")
 
-@router.get("/categories/{merchant_id}")
+@router.get("/categories/{merchant_id}", response_model=CategoriesResponse, response_model_exclude_unset=True)
+@cached("long")
 async def get_categories(
     merchant_id: str,
     # Pagination
@@ -540,10 +743,11 @@ async def get_categories(
     status: Optional[str] = Query(default=None, description="Filter by category status"),
     # Sorting
     sort_by: str = Query(default="name", description="Sort by: name, created_at, updated_at, sort_order"),
-    sort_order: str = Query(default="asc", regex="^(asc|desc)$", description="Sort order: asc or desc"),
+    sort_order: SortOrder = Query(default="asc", description="Sort order: asc or desc"),
     # Structure options
     include_children: bool = Query(default=False, description="Include child categories in response"),
-    flat_structure: bool = Query(default=True, description="Return flat list vs hierarchical structure")
+    flat_structure: bool = Query(default=True, description="Return flat list vs hierarchical structure"),
+    debug: bool = Query(default=False, description="Echo applied filters, sorting and result metadata")
 ):
     """
     Get product categories list with hierarchical support
@@ -560,12 +764,13 @@ async def get_categories(
         sort_order: Sorting direction
         include_children: Include child categories
         flat_structure: Return flat vs hierarchical
+        debug: Include filters_applied, sorting, structure_options and metadata blocks
         
     Returns:
         Categories list with metadata from Zid API
     """
     try:
-        client = ZidAPIClient(merchant_id)
+        client = get_zid_client(merchant_id)
         
         # Build query parameters for Zid API
         params = {
@@ -576,14 +781,12 @@ async def get_categories(
         }
         
         # Add filtering parameters
-        if search:
-            params["search"] = search
-        if parent_id:
-            params["parent_id"] = parent_id
-        if level is not None:
-            params["level"] = level
-        if status:
-            params["status"] = status
+        params.update(_filter_params({
+            "search": search,
+            "parent_id": parent_id,
+            "level": level,
+            "status": status
+        }))
         if include_children:
             params["include_children"] = "true"
         if not flat_structure:
@@ -611,27 +814,32 @@ async def get_categories(
                     "total_pages": (total_count + limit - 1) // limit if total_count > 0 else 0,
                     "has_next": page * limit < total_count,
                     "has_prev": page > 1
-                },
-                "filters_applied": {
-                    "search": search,
-                    "parent_id": parent_id,
-                    "level": level,
-                    "status": status
-                },
-                "sorting": {
-                    "sort_by": sort_by,
-                    "sort_order": sort_order
-                },
-                "structure_options": {
-                    "include_children": include_children,
-                    "flat_structure": flat_structure
-                },
-                "metadata": {
-                    "results_count": len(categories_list),
-                    "total_categories": total_count
                 }
             }
             
+            # Echoes of the request parameters are only useful when debugging
+            if debug:
+                response.update({
+                    "filters_applied": {
+                        "search": search,
+                        "parent_id": parent_id,
+                        "level": level,
+                        "status": status
+                    },
+                    "sorting": {
+                        "sort_by": sort_by,
+                        "sort_order": sort_order
+                    },
+                    "structure_options": {
+                        "include_children": include_children,
+                        "flat_structure": flat_structure
+                    },
+                    "metadata": {
+                        "results_count": len(categories_list),
+                        "total_categories": total_count
+                    }
+                })
+            
             logger.info(f"Categories retrieved successfully for merchant {merchant_id}: {len(categories_list)} items")
             return response
             
@@ -642,8 +850,23 @@ async def get_categories(
         logger.error(f"Categories request failed for merchant {merchant_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Categories request failed: {str(e)}")
 
+@router.post("/customers/{merchant_id}/batch")
+async def get_customers_batch(merchant_id: str, request: BatchRequest):
+    """
+    Get several customers by ID in one call
+    
+    Args:
+        merchant_id: Merchant identifier
+        request: Customer IDs (up to 100, duplicates ignored)
+        
+    Returns:
+        Customers keyed by ID, plus the IDs Zid did not return
+    """
+    return await _batch_response(merchant_id, "/v1/managers/customers/{}", "customer", request.ids)
+
 @router.get("/customers/{merchant_id}/{customer_id}")
-async def get_customer_by_id(merchant_id: str, customer_id: str):
+@cached("normal", etag=True)
+async def get_customer_by_id(merchant_id: str, customer_id: str, request: Request):
     """
     Get a single customer by ID with complete details
     
@@ -655,7 +878,7 @@ async def get_customer_by_id(merchant_id: str, customer_id: str):
         Complete customer information from Zid API
     """
     try:
-        client = ZidAPIClient(merchant_id)
+        client = get_zid_client(merchant_id)
         
         logger.info(f"Fetching customer {customer_id} for merchant {merchant_id}")
         
@@ -681,9 +904,11 @@ async def get_customer_by_id(merchant_id: str, customer_id: str):
         raise HTTPException(status_code=500, detail=f"Customer request failed: {str(e)}")
 
 @router.get("/categories/{merchant_id}/{category_id}")
+@cached("long", etag=True)
 async def get_category_by_id(
     merchant_id: str, 
     category_id: str,
+    request: Request,
     include_children: bool = Query(default=False, description="Include child categories in response"),
     include_products: bool = Query(default=False, description="Include products in this category")
 ):
@@ -700,7 +925,7 @@ async def get_category_by_id(
         Complete category information from Zid API
     """
     try:
-        client = ZidAPIClient(merchant_id)
+        client = get_zid_client(merchant_id)
         
         # Build query parameters
         params = {}
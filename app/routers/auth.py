@@ -3,17 +3,23 @@ from fastapi import APIRouter, HTTPException, Request, Query, Depends
 from fastapi.responses import RedirectResponse
 from pydantic import BaseModel
 import logging
+import uuid
 
-from ..auth.oauth_service import OAuthService
+from ..auth.oauth_service import OAuthService, get_oauth_service
+from ..api.zid_client import get_zid_client, invalidate_zid_credentials
+from ..services.response_cache import purge_merchant_cache
 from ..models.database import ZidCredential
-from ..database import get_db_session
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from ..database import get_db
+from sqlalchemy import update
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+async def _oauth_service() -> OAuthService:
+    """Shared OAuthService; async so FastAPI doesn't dispatch it to the threadpool"""
+    return get_oauth_service()
+
 class AuthorizeRequest(BaseModel):
     merchant_id: str
     scopes: Optional[list] = None
@@ -32,7 +38,10 @@ class TokenStatusResponse(BaseModel):
     last_updated: Optional[str] = None
 
 @router.post("/authorize")
-async def authorize_merchant(request: AuthorizeRequest):
+async def authorize_merchant(
+    request: AuthorizeRequest,
+    oauth_service: OAuthService = Depends(_oauth_service)
+):
     """
     Generate OAuth authorization URL for merchant authentication
     
@@ -43,7 +52,6 @@ async def authorize_merchant(request: AuthorizeRequest):
         Authorization URL for redirect
     """
     try:
-        oauth_service = OAuthService()
         auth_url = await oauth_service.generate_authorization_url(
             merchant_id=request.merchant_id,
             scopes=request.scopes
@@ -62,7 +70,10 @@ async def authorize_merchant(request: AuthorizeRequest):
         raise HTTPException(status_code=500, detail="Failed to generate authorization URL")
 
 @router.get("/zid")
-async def zid_install_redirect(request: Request):
+async def zid_install_redirect(
+    request: Request,
+    oauth_service: OAuthService = Depends(_oauth_service)
+):
     """
     Handle Zid app installation redirect (when merchant clicks 'Install on my store')
     
@@ -79,11 +90,8 @@ async def zid_install_redirect(request: Request):
     try:
         # Generate a unique merchant ID for this installation attempt
         # In a real app, you might extract this from session or other context
-        import uuid
         temp_merchant_id = f"install-{uuid.uuid4().hex[:8]}"
         
-        oauth_service = OAuthService()
-        
         # Generate authorization URL - Zid will identify the merchant during OAuth
         auth_url = await oauth_service.generate_authorization_url(
             merchant_id=temp_merchant_id,
@@ -104,7 +112,8 @@ async def oauth_callback(
     request: Request,
     code: Optional[str] = Query(None, description="Authorization code from Zid"),
     state: Optional[str] = Query(None, description="State parameter for CSRF protection"),
-    error: Optional[str] = Query(None, description="Error from OAuth provider")
+    error: Optional[str] = Query(None, description="Error from OAuth provider"),
+    oauth_service: OAuthService = Depends(_oauth_service)
 ):
     """
     Handle OAuth callback from Zid
@@ -137,8 +146,6 @@ async def oauth_callback(
         }
     
     try:
-        oauth_service = OAuthService()
-        
         # Get client information for audit logging
         client_ip = request.client.host if request.client else None
         user_agent = request.headers.get("User-Agent")
@@ -151,6 +158,8 @@ async def oauth_callback(
             user_agent=user_agent
         )
         
+        invalidate_zid_credentials(result["merchant_id"])
+        await purge_merchant_cache(result["merchant_id"])
         logger.info(f"OAuth callback completed for merchant {result['merchant_id']}")
         
         return CallbackResponse(**result)
@@ -164,7 +173,8 @@ async def oauth_callback(
 @router.post("/refresh/{merchant_id}")
 async def refresh_merchant_tokens(
     merchant_id: str,
-    request: Request
+    request: Request,
+    oauth_service: OAuthService = Depends(_oauth_service)
 ):
     """
     Refresh expired tokens for a merchant
@@ -176,8 +186,6 @@ async def refresh_merchant_tokens(
         Token refresh confirmation
     """
     try:
-        oauth_service = OAuthService()
-        
         # Get client information for audit logging
         client_ip = request.client.host if request.client else None
         user_agent = request.headers.get("User-Agent")
@@ -188,6 +196,8 @@ async def refresh_merchant_tokens(
             user_agent=user_agent
         )
         
+        invalidate_zid_credentials(merchant_id)
+        await purge_merchant_cache(merchant_id)
         logger.info(f"Tokens refreshed for merchant {merchant_id}")
         return result
         
@@ -198,10 +208,7 @@ async def refresh_merchant_tokens(
         raise HTTPException(status_code=500, detail="Token refresh failed")
 
 @router.post("/revoke/{merchant_id}")
-async def revoke_merchant_auth(
-    merchant_id: str,
-    db: AsyncSession = Depends(get_db_session)
-):
+async def revoke_merchant_auth(merchant_id: str):
     """
     Revoke authentication for a merchant
     
@@ -212,16 +219,18 @@ async def revoke_merchant_auth(
         Revocation confirmation
     """
     try:
-        stmt = select(ZidCredential).where(ZidCredential.merchant_id == merchant_id)
-        result = await db.execute(stmt)
-        credential = result.scalar_one_or_none()
-        
-        if not credential:
-            raise HTTPException(status_code=404, detail="Merchant authentication not found")
+        # Deactivate the credential in one statement; the session is released on block exit
+        async with get_db() as db:
+            stmt = update(ZidCredential).where(
+                ZidCredential.merchant_id == merchant_id
+            ).values(is_active=False).returning(ZidCredential.id)
+            result = await db.execute(stmt)
+            
+            if result.scalar_one_or_none() is None:
+                raise HTTPException(status_code=404, detail="Merchant authentication not found")
         
-        # Deactivate the credential
-        credential.is_active = False
-        await db.commit()
+        invalidate_zid_credentials(merchant_id)
+        await purge_merchant_cache(merchant_id)
         
         logger.info(f"Revoked authentication for merchant {merchant_id}")
         
@@ -250,10 +259,8 @@ async def introspect_merchant_token(merchant_id: str):
     Returns:
         Token status including whether active, expired, and timestamps
     """
-    from ..api.zid_client import ZidAPIClient
-
     try:
-        client = ZidAPIClient(merchant_id)
+        client = get_zid_client(merchant_id)
         result = await client.validate_tokens()
 
         return TokenStatusResponse(
@@ -278,10 +285,8 @@ async def get_merchant_profile(merchant_id: str):
     Returns:
         Merchant profile data from Zid API
     """
-    from ..api.zid_client import ZidAPIClient
-    
     try:
-        client = ZidAPIClient(merchant_id)
+        client = get_zid_client(merchant_id)
         
         # Call Zid API endpoint for manager account profile
         profile_data = await client.get("/managers/account/profile")
@@ -0,0 +1,115 @@
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+from sqlalchemy import insert
+import asyncio
+import logging
+
+from ..models.database import TokenAuditLog
+from ..database import get_audit_db
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Background batching state (set while the flusher is running)
+_queue: Optional[asyncio.Queue] = None
+_flusher_task: Optional[asyncio.Task] = None
+_STOP = object()
+dropped_events = 0
+
+async def log_audit(events: List[Dict[str, Any]]):
+    """
+    Write token audit events in a single Core INSERT
+    
+    Args:
+        events: Dicts of TokenAuditLog column values (id and timestamp are defaulted)
+    """
+    if not events:
+        return
+    
+    async with get_audit_db() as db:
+        await db.execute(insert(TokenAuditLog), events)
+        await db.commit()
+
+def enqueue_audit(event: Dict[str, Any]) -> bool:
+    """
+    Hand an audit event to the background flusher without blocking
+    
+    Args:
+        event: Dict of TokenAuditLog column values
+        
+    Returns:
+        False if the flusher is not running and the caller should write directly
+    """
+    global dropped_events
+    
+    if _queue is None:
+        return False
+    
+    # Stamp now so the row reflects when the action happened, not when it was flushed
+    event.setdefault("timestamp", datetime.utcnow())
+    try:
+        _queue.put_nowait(event)
+    except asyncio.QueueFull:
+        dropped_events += 1
+        logger.warning(f"Audit queue full, dropped event ({dropped_events} dropped so far)")
+    return True
+
+async def _write_batch(batch: List[Dict[str, Any]]):
+    try:
+        await log_audit(batch)
+    except Exception as e:
+        logger.error(f"Failed to flush {len(batch)} audit events: {str(e)}")
+
+async def _flush_loop(queue: asyncio.Queue):
+    """Drain the queue in batches of up to audit_batch_size or every audit_flush_ms"""
+    loop = asyncio.get_running_loop()
+    batch_size = settings.audit_batch_size
+    interval = settings.audit_flush_ms / 1000
+    
+    while True:
+        event = await queue.get()
+        if event is _STOP:
+            return
+        
+        batch = [event]
+        stopping = False
+        deadline = loop.time() + interval
+        while len(batch) < batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if event is _STOP:
+                stopping = True
+                break
+            batch.append(event)
+        
+        await _write_batch(batch)
+        if stopping:
+            return
+
+def start_audit_flusher():
+    """Start the background audit flusher (called on application startup)"""
+    global _queue, _flusher_task
+    
+    if _flusher_task is not None:
+        return
+    _queue = asyncio.Queue(maxsize=settings.audit_queue_size)
+    _flusher_task = asyncio.create_task(_flush_loop(_queue))
+    logger.info("Audit log flusher started")
+
+async def stop_audit_flusher():
+    """Flush pending audit events and stop the flusher (called on application shutdown)"""
+    global _queue, _flusher_task
+    
+    if _flusher_task is None:
+        return
+    queue, task = _queue, _flusher_task
+    # New events are written directly from here on
+    _queue = _flusher_task = None
+    await queue.put(_STOP)
+    await task
+    logger.info("Audit log flusher stopped")
@@ -0,0 +1,198 @@
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+import asyncio
+import functools
+import hashlib
+import logging
+import re
+import time
+
+import orjson
+import redis.asyncio as redis
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+
+from ..api.zid_client import ZidUnavailableError
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached response is served without calling Zid
+CACHE_POLICIES = {
+    "short": 5,    # orders, products
+    "normal": 30,  # customers
+    "long": 60,    # categories
+}
+
+_redis: Optional[redis.Redis] = None
+
+# Circuit breaker: after a connection error, Redis is skipped until this monotonic time
+_redis_down_until = 0.0
+
+# In-flight loads by cache key, so concurrent misses for the same key call Zid once
+_inflight: Dict[str, asyncio.Task] = {}
+
+def _get_redis() -> redis.Redis:
+    """Return the shared Redis client, creating it on first use"""
+    global _redis
+    
+    if _redis is None:
+        # Fail fast so an unavailable Redis only costs a cache miss
+        _redis = redis.from_url(
+            settings.redis_url,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5
+        )
+    return _redis
+
+async def close_response_cache():
+    """Close the Redis client (called on application shutdown)"""
+    global _redis
+    
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+def _redis_available() -> bool:
+    return time.monotonic() >= _redis_down_until
+
+def _redis_failed(operation: str, error: Exception):
+    """Log a cache error and open the breaker if Redis itself is unreachable"""
+    global _redis_down_until
+    
+    if isinstance(error, (redis.ConnectionError, redis.TimeoutError)):
+        _redis_down_until = time.monotonic() + settings.response_cache_backoff_seconds
+        logger.warning(
+            f"Response cache {operation} failed, skipping Redis for "
+            f"{settings.response_cache_backoff_seconds:g}s: {str(error)}"
+        )
+    else:
+        logger.warning(f"Response cache {operation} failed: {str(error)}")
+
+async def _read(key: str) -> Optional[Dict[str, Any]]:
+    if not _redis_available():
+        return None
+    try:
+        raw = await _get_redis().get(key)
+    except Exception as e:
+        _redis_failed("read", e)
+        return None
+    return orjson.loads(raw) if raw else None
+
+async def _write(key: str, entry: Dict[str, Any], expire_seconds: int):
+    if not _redis_available():
+        return
+    try:
+        await _get_redis().set(key, orjson.dumps(entry), ex=expire_seconds)
+    except Exception as e:
+        _redis_failed("write", e)
+
+async def purge_merchant_cache(merchant_id: str):
+    """Drop every cached response for a merchant, e.g. after revoke or delete"""
+    if not _redis_available():
+        return
+    # Escape glob metacharacters so one merchant's pattern can't match others
+    pattern = "zid:" + re.sub(r"([*?\[\]\\])", r"\\\1", merchant_id) + ":*"
+    try:
+        client = _get_redis()
+        keys = [key async for key in client.scan_iter(match=pattern, count=500)]
+        if keys:
+            await client.unlink(*keys)
+    except Exception as e:
+        _redis_failed("purge", e)
+
+def _cache_key(name: str, params: Dict[str, Any]) -> str:
+    merchant_id = params.get("merchant_id")
+    query = urlencode(sorted(
+        (k, v) for k, v in params.items()
+        if k != "merchant_id" and v is not None and not isinstance(v, Request)
+    ))
+    return f"zid:{merchant_id}:{name}?{query}"
+
+def _upstream_unavailable(error: Optional[BaseException]) -> bool:
+    """Whether a handler failure was caused by Zid being unreachable (the routes re-wrap errors)"""
+    while error is not None:
+        if isinstance(error, ZidUnavailableError):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+def _etag(body: Dict[str, Any]) -> str:
+    return '"' + hashlib.blake2b(orjson.dumps(body), digest_size=16).hexdigest() + '"'
+
+def _conditional_response(request: Request, body: Dict[str, Any], etag: str, max_age: int) -> Response:
+    """304 if the client already holds this ETag, otherwise the body with its ETag"""
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    return ORJSONResponse(body, headers={"ETag": etag, "Cache-Control": f"private, max-age={max_age}"})
+
+async def _load_once(key: str, load):
+    task = _inflight.get(key)
+    if task is None:
+        task = _inflight[key] = asyncio.ensure_future(load())
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # A cancelled waiter must not cancel the load other requests are waiting on
+    return await asyncio.shield(task)
+
+def cached(policy: str = "normal", etag: bool = False):
+    """
+    Cache a read endpoint's response in Redis per merchant and query parameters
+    
+    Successful responses are served from Redis for the policy's TTL. Older entries
+    are kept for response_cache_stale_seconds and returned (flagged with
+    cache_fallback) when the handler fails because Zid is unreachable or erroring.
+    Concurrent misses for the same key share a single handler call.
+    
+    Args:
+        policy: One of CACHE_POLICIES
+        etag: Answer If-None-Match with 304; the endpoint must take a `request: Request`
+    """
+    ttl = CACHE_POLICIES[policy]
+    
+    def decorator(func):
+        def respond(kwargs: Dict[str, Any], entry: Dict[str, Any]):
+            if entry.get("etag") is None:
+                return entry["body"]
+            return _conditional_response(kwargs["request"], entry["body"], entry["etag"], ttl)
+        
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            if not settings.response_cache_enabled:
+                body = await func(**kwargs)
+                if etag and isinstance(body, dict):
+                    return respond(kwargs, {"body": body, "etag": _etag(body)})
+                return body
+            
+            key = _cache_key(func.__name__, kwargs)
+            entry = await _read(key)
+            if entry is not None and entry["fresh_until"] > time.time():
+                return respond(kwargs, entry)
+            
+            async def load():
+                body = await func(**kwargs)
+                if not (isinstance(body, dict) and body.get("success")):
+                    return {"body": body}
+                generated_at = time.time()
+                # Hashed once per cache entry rather than on every conditional request
+                loaded = {
+                    "body": body,
+                    "etag": _etag(body) if etag else None,
+                    "generated_at": generated_at,
+                    "fresh_until": generated_at + ttl
+                }
+                await _write(key, loaded, ttl + settings.response_cache_stale_seconds)
+                return loaded
+            
+            try:
+                return respond(kwargs, await _load_once(key, load))
+            except HTTPException as e:
+                # Only an outage falls back; revoked merchants and missing data must fail
+                if entry is not None and e.status_code >= 500 and _upstream_unavailable(e):
+                    logger.warning(f"Serving stale response for {key} after upstream failure")
+                    return {**entry["body"], "cache_fallback": True}
+                raise
+        
+        return wrapper
+    
+    return decorator
@@ -0,0 +1,70 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import delete
+import asyncio
+import logging
+
+from ..models.database import OAuthState
+from ..database import get_db
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_cleanup_task: Optional[asyncio.Task] = None
+
+async def delete_stale_oauth_states() -> int:
+    """
+    Delete OAuth states that have been used or have expired
+    
+    Returns:
+        Number of rows deleted
+    """
+    async with get_db() as db:
+        # Two statements so each matches its partial index; an OR would scan the table
+        expired = await db.execute(
+            delete(OAuthState).where(
+                OAuthState.used == False,
+                OAuthState.expires_at < datetime.utcnow()
+            )
+        )
+        used = await db.execute(
+            delete(OAuthState).where(OAuthState.used == True)
+        )
+        await db.commit()
+        return expired.rowcount + used.rowcount
+
+async def _cleanup_loop():
+    """Purge stale OAuth states every oauth_state_cleanup_interval_seconds"""
+    interval = settings.oauth_state_cleanup_interval_seconds
+    
+    while True:
+        try:
+            deleted = await delete_stale_oauth_states()
+            if deleted:
+                logger.info(f"Deleted {deleted} stale OAuth states")
+        except Exception as e:
+            logger.error(f"OAuth state cleanup failed: {str(e)}")
+        await asyncio.sleep(interval)
+
+def start_state_cleanup():
+    """Start the periodic OAuth state cleanup (called on application startup)"""
+    global _cleanup_task
+    
+    if _cleanup_task is not None:
+        return
+    _cleanup_task = asyncio.create_task(_cleanup_loop())
+    logger.info("OAuth state cleanup task started")
+
+async def stop_state_cleanup():
+    """Cancel the periodic OAuth state cleanup (called on application shutdown)"""
+    global _cleanup_task
+    
+    if _cleanup_task is None:
+        return
+    task, _cleanup_task = _cleanup_task, None
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    logger.info("OAuth state cleanup task stopped")
@@ -0,0 +1,74 @@
+import base64
+import os
+import re
+from typing import Dict, List
+
+import pytest
+import redis.asyncio as redis
+
+# Settings are parsed at import time; give the app a self-contained test configuration
+os.environ.setdefault("ZID_CLIENT_ID", "test-client")
+os.environ.setdefault("ZID_CLIENT_SECRET", "test-secret")
+os.environ.setdefault("ZID_REDIRECT_URI", "http://testserver/auth/zid/callback")
+os.environ.setdefault("ENCRYPTION_KEY", base64.b64encode(b"k" * 32).decode())
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("RUN_MIGRATIONS_ON_STARTUP", "false")
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate the subset of Redis glob syntax the app uses (*, ?, backslash escapes)"""
+    out, i = [], 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        out.append(".*" if char == "*" else "." if char == "?" else re.escape(char))
+        i += 1
+    return "^" + "".join(out) + "$"
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis.asyncio calls made by the response cache"""
+
+    def __init__(self):
+        self.data: Dict[str, bytes] = {}
+        self.calls: List[str] = []
+        self.fail = False
+
+    def _call(self, name: str):
+        self.calls.append(name)
+        if self.fail:
+            raise redis.ConnectionError("connection refused")
+
+    async def get(self, key):
+        self._call("get")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self._call("set")
+        self.data[key] = value
+
+    async def scan_iter(self, match=None, count=None):
+        self._call("scan")
+        regex = re.compile(_glob_to_regex(match or "*"))
+        for key in list(self.data):
+            if regex.match(key):
+                yield key
+
+    async def unlink(self, *keys):
+        self._call("unlink")
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    from app.services import response_cache
+
+    fake = FakeRedis()
+    monkeypatch.setattr(response_cache, "_get_redis", lambda: fake)
+    monkeypatch.setattr(response_cache, "_redis_down_until", 0.0)
+    monkeypatch.setattr(response_cache.settings, "response_cache_enabled", True)
+    return fake
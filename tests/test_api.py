@@ -0,0 +1,80 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.routers import api
+
+
+class FakeZidClient:
+    """Answers orders listings and detail lookups without calling Zid"""
+
+    def __init__(self, orders):
+        self.orders = orders
+        self.paths = []
+
+    async def get(self, endpoint, params=None):
+        self.paths.append(endpoint)
+        if endpoint == "/v1/managers/orders":
+            return {"total_orders_count": len(self.orders), "orders": self.orders}
+        resource = "customer" if "/customers/" in endpoint else "product" if "/products/" in endpoint else "order"
+        return {resource: {"id": endpoint.rsplit("/", 1)[-1]}}
+
+
+def make_orders(count, products_per_order=1):
+    return [
+        {"id": i, "customer": {"id": i}, "products": [{"id": f"{i}-{p}"} for p in range(products_per_order)]}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def zid(monkeypatch):
+    fake = FakeZidClient(make_orders(10))
+    monkeypatch.setattr(api, "get_zid_client", lambda merchant_id: fake)
+    monkeypatch.setattr(settings, "response_cache_enabled", False)
+    return fake
+
+
+@pytest.fixture
+def client(zid):
+    return TestClient(app)
+
+
+def test_expand_embeds_related_resources(client, zid):
+    response = client.get("/api/orders/m1", params={"limit": 10, "expand": "customers"})
+
+    assert response.status_code == 200
+    assert sorted(response.json()["expanded"]["customers"]) == [str(i) for i in range(10)]
+
+
+def test_expand_above_the_cap_is_rejected_before_fetching(client, zid):
+    zid.orders = make_orders(30)  # 30 customers + 30 products > MAX_EXPAND_IDS
+
+    response = client.get("/api/orders/m1", params={"limit": 30, "expand": "customers,products"})
+
+    assert response.status_code == 400
+    assert "at most 50" in response.json()["detail"]
+    assert zid.paths == ["/v1/managers/orders"]
+
+
+def test_batch_accepts_100_ids(client):
+    response = client.post("/api/products/m1/batch", json={"ids": [str(i) for i in range(100)]})
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 100
+
+
+def test_batch_fetches_each_id_once(client, zid):
+    response = client.post("/api/products/m1/batch", json={"ids": ["1", "2", "1"]})
+
+    assert response.status_code == 200
+    assert sorted(response.json()["items"]) == ["1", "2"]
+    assert sorted(zid.paths) == ["/v1/managers/store/products/1", "/v1/managers/store/products/2"]
+
+
+@pytest.mark.parametrize("ids", [[], [str(i) for i in range(101)]])
+def test_batch_rejects_empty_or_oversized_requests(client, ids):
+    response = client.post("/api/orders/m1/batch", json={"ids": ids})
+
+    assert response.status_code == 422
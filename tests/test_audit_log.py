@@ -0,0 +1,25 @@
+import pytest
+
+from app.services import audit_log
+
+
+@pytest.mark.asyncio
+async def test_flusher_batches_events_and_drains_on_stop(monkeypatch):
+    batches = []
+
+    async def fake_log_audit(events):
+        batches.append([event["action"] for event in events])
+
+    monkeypatch.setattr(audit_log, "log_audit", fake_log_audit)
+    monkeypatch.setattr(audit_log.settings, "audit_batch_size", 2)
+    monkeypatch.setattr(audit_log.settings, "audit_flush_ms", 50)
+
+    assert audit_log.enqueue_audit({"action": "before"}) is False
+
+    audit_log.start_audit_flusher()
+    for i in range(5):
+        assert audit_log.enqueue_audit({"merchant_id": "m1", "action": f"a{i}", "success": True})
+    await audit_log.stop_audit_flusher()
+
+    assert batches == [["a0", "a1"], ["a2", "a3"], ["a4"]]
+    assert audit_log.enqueue_audit({"action": "after"}) is False
@@ -0,0 +1,189 @@
+import asyncio
+import time
+
+import orjson
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api.zid_client import ZidUnavailableError
+from app.services import response_cache
+from app.services.response_cache import (
+    _cache_key,
+    _load_once,
+    _read,
+    _write,
+    cached,
+    purge_merchant_cache,
+)
+
+
+def make_request(if_none_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def expire_all(fake):
+    """Turn every cached entry stale without dropping it"""
+    for key, raw in fake.data.items():
+        entry = orjson.loads(raw)
+        entry["fresh_until"] = 0
+        fake.data[key] = orjson.dumps(entry)
+
+
+def test_cache_key_sorts_params_and_skips_none_and_request():
+    key = _cache_key("get_orders", {
+        "merchant_id": "m1",
+        "page": 2,
+        "limit": 20,
+        "status": None,
+        "request": make_request(),
+    })
+    assert key == "zid:m1:get_orders?limit=20&page=2"
+
+
+@pytest.mark.asyncio
+async def test_fresh_entry_is_served_without_calling_handler(fake_redis):
+    calls = []
+
+    @cached("short")
+    async def get_things(merchant_id: str, page: int = 1):
+        calls.append(page)
+        return {"success": True, "page": page}
+
+    assert await get_things(merchant_id="m1", page=1) == {"success": True, "page": 1}
+    assert await get_things(merchant_id="m1", page=1) == {"success": True, "page": 1}
+    assert calls == [1]
+
+    # Different parameters are a different entry
+    await get_things(merchant_id="m1", page=2)
+    assert calls == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_unsuccessful_bodies_are_not_cached(fake_redis):
+    @cached("short")
+    async def get_things(merchant_id: str):
+        return {"success": False}
+
+    await get_things(merchant_id="m1")
+    assert fake_redis.data == {}
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_when_zid_is_unavailable(fake_redis):
+    state = {"down": False}
+
+    @cached("short")
+    async def get_things(merchant_id: str):
+        # Mirrors the routes, which re-wrap every failure in a 500
+        try:
+            if state["down"]:
+                raise ZidUnavailableError("Zid API returned 503")
+            return {"success": True, "items": [1]}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    await get_things(merchant_id="m1")
+    expire_all(fake_redis)
+    state["down"] = True
+
+    assert await get_things(merchant_id="m1") == {"success": True, "items": [1], "cache_fallback": True}
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_not_served_for_other_failures(fake_redis):
+    state = {"revoked": False}
+
+    @cached("short")
+    async def get_things(merchant_id: str):
+        try:
+            if state["revoked"]:
+                raise HTTPException(status_code=400, detail="No active credentials")
+            return {"success": True, "items": [1]}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    await get_things(merchant_id="m1")
+    expire_all(fake_redis)
+    state["revoked"] = True
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_things(merchant_id="m1")
+    assert exc_info.value.status_code == 500
+
+
+@pytest.mark.asyncio
+async def test_etag_answers_matching_if_none_match_with_304(fake_redis):
+    @cached("short", etag=True)
+    async def get_thing(merchant_id: str, thing_id: str, request: Request):
+        return {"success": True, "thing": thing_id}
+
+    first = await get_thing(merchant_id="m1", thing_id="7", request=make_request())
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, max-age=5"
+
+    again = await get_thing(merchant_id="m1", thing_id="7", request=make_request(etag))
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+
+    other = await get_thing(merchant_id="m1", thing_id="7", request=make_request('"other"'))
+    assert other.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_load_once_coalesces_concurrent_loads():
+    release = asyncio.Event()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await release.wait()
+        return {"body": "shared"}
+
+    waiters = [asyncio.ensure_future(_load_once("zid:m1:coalesce", load)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == [{"body": "shared"}] * 5
+    assert calls == [1]
+    assert "zid:m1:coalesce" not in response_cache._inflight
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_skips_redis_after_connection_error(fake_redis, monkeypatch):
+    monkeypatch.setattr(response_cache.settings, "response_cache_backoff_seconds", 10.0)
+    fake_redis.fail = True
+
+    assert await _read("zid:m1:k") is None
+    assert fake_redis.calls == ["get"]
+    assert response_cache._redis_down_until > time.monotonic()
+
+    # While open, neither reads nor writes touch Redis
+    fake_redis.fail = False
+    assert await _read("zid:m1:k") is None
+    await _write("zid:m1:k", {"body": 1}, 60)
+    assert fake_redis.calls == ["get"]
+
+    # Once the window has passed, Redis is tried again
+    monkeypatch.setattr(response_cache, "_redis_down_until", 0.0)
+    await _write("zid:m1:k", {"body": 1}, 60)
+    assert await _read("zid:m1:k") == {"body": 1}
+
+
+@pytest.mark.asyncio
+async def test_purge_only_drops_the_merchants_keys(fake_redis):
+    fake_redis.data = {
+        "zid:m1:get_orders?page=1": b"{}",
+        "zid:m1:get_products?": b"{}",
+        "zid:m10:get_orders?page=1": b"{}",
+        "zid:m*:get_orders?": b"{}",
+    }
+
+    await purge_merchant_cache("m1")
+    assert sorted(fake_redis.data) == ["zid:m*:get_orders?", "zid:m10:get_orders?page=1"]
+
+    # Glob characters in a merchant ID are matched literally
+    await purge_merchant_cache("m*")
+    assert list(fake_redis.data) == ["zid:m10:get_orders?page=1"]
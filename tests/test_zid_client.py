@@ -0,0 +1,55 @@
+import asyncio
+from collections import OrderedDict
+
+import pytest
+
+from app.api import zid_client
+from app.api.zid_client import _RateLimiter, _get_rate_limiter, _register_client, get_zid_client
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_reserves_slots_and_sleeps_outside_the_lock(monkeypatch):
+    limiter = _RateLimiter(rate=2, period=60)
+    waits = []
+
+    async def fake_sleep(seconds):
+        # Other callers must be able to reserve while this one waits
+        assert not limiter._lock.locked()
+        waits.append(seconds)
+
+    monkeypatch.setattr(zid_client.asyncio, "sleep", fake_sleep)
+
+    await asyncio.gather(*(limiter.acquire() for _ in range(4)))
+
+    # Two slots from the full bucket, then one every 30s
+    assert sorted(waits) == [pytest.approx(30, abs=0.1), pytest.approx(60, abs=0.1)]
+    assert limiter._tokens == pytest.approx(-2, abs=0.01)
+
+
+def test_rate_limiters_are_bounded_lru(monkeypatch):
+    monkeypatch.setattr(zid_client, "_merchant_limiters", OrderedDict())
+    monkeypatch.setattr(zid_client, "_MAX_TRACKED_MERCHANTS", 2)
+
+    first = _get_rate_limiter("a", 120, 60)
+    _get_rate_limiter("b", 120, 60)
+    assert _get_rate_limiter("a", 120, 60) is first
+    _get_rate_limiter("c", 120, 60)
+
+    assert list(zid_client._merchant_limiters) == ["a", "c"]
+
+
+def test_clients_are_registered_only_once_credentials_are_found(monkeypatch):
+    monkeypatch.setattr(zid_client, "_clients", OrderedDict())
+    monkeypatch.setattr(zid_client, "_MAX_TRACKED_MERCHANTS", 2)
+
+    unknown = get_zid_client("a")
+    assert get_zid_client("a") is not unknown
+    assert "a" not in zid_client._clients
+
+    _register_client(unknown)
+    assert get_zid_client("a") is unknown
+
+    _register_client(zid_client.ZidAPIClient("b"))
+    get_zid_client("a")
+    _register_client(zid_client.ZidAPIClient("c"))
+    assert list(zid_client._clients) == ["a", "c"]